@@ -40,4 +40,11 @@ def create_app():
     from .docs import bp as docs_bp
     app.register_blueprint(docs_bp)
 
+    # Start probing SSH profiles so /ping and the circuit breaker have data early
+    try:
+        from .health import get_health_monitor
+        get_health_monitor()
+    except Exception:
+        logging.getLogger(__name__).exception("Could not start SSH health monitor")
+
     return app
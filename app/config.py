@@ -28,6 +28,38 @@ DEFAULT_CONFIG = {
         "title": "SSH Log Tools",
         "icon_path": ""
     },
+    "api": {
+        "ssh_timeout": 15,  # seconds for SSH connect/commands
+        "client_timeout_ms": 30000,
+        "ssh_keepalive": 30,  # seconds between keepalives on pooled transports
+        "ssh_idle_timeout": 300,  # close pooled transports idle this long
+        "ssh_max_sessions": 8,  # concurrent channels per pooled transport
+        "run_workers": 16,  # thread pool size for /api/run
+        "run_per_host": 4,  # concurrent SSH commands per profile in /api/run
+        "stream_max_bytes": 8388608,  # byte budget for streamed remote output
+        "follow_max_per_profile": 4,  # distinct live follow channels per profile
+        "tail_engine": "sftp",  # "sftp" or "shell" for plain single-file tails
+        "list_cache_ttl": 30,  # seconds before cached glob expansions are revalidated
+        "list_cache_entries": 256,  # max cached glob expansions (least recently used evicted)
+        "health_interval": 30,  # seconds between background SSH health probes
+        "health_fail_threshold": 1,  # consecutive failures before the circuit opens
+        "attach_workers": 4,  # concurrent fetches for batch remote image attach
+        "search_index": True,  # trigram index for substring search over local logs
+        "search_index_block": 1048576,  # bytes per indexed block
+        "search_index_min_size": 8388608,  # smaller logs are always scanned linearly
+        "search_workers": 0,  # worker processes for parallel search (0 = one per core, 1 = off)
+        "search_parallel_min_size": 67108864,  # logs at least this large are searched in parallel
+        "search_chunk_size": 16777216,  # bytes per parallel search chunk
+        "line_index_step": 1000,  # lines between checkpoints in the sparse line index
+        "search_cache_entries": 64,  # cached search results resumed on append (0 = off)
+        "search_index_builds": 2,  # logs whose trigram index is built at the same time
+    },
+    "images_cache": {
+        "ttl": 60,
+        "max_bytes": 20971520,
+        "disk_max_bytes": 536870912,  # on-disk tier under data/image_cache (0 disables)
+        "thumb_max_bytes": 67108864,  # thumbnails under data/image_cache/thumbs
+    },
     "export": {
         "cell_width": 18,  # Excel column width for image column
         "cell_height": 96,  # Row height (points) for rows with images
@@ -94,6 +126,16 @@ def load_config(path: str = "config.json") -> Dict[str, Any]:
     merged_export = DEFAULT_CONFIG.get("export", {}).copy()
     merged_export.update(user_export or {})
     cfg["export"] = merged_export
+    # Deep-merge api block
+    user_api = user_cfg.get("api") if isinstance(user_cfg.get("api"), dict) else {}
+    merged_api = DEFAULT_CONFIG.get("api", {}).copy()
+    merged_api.update(user_api or {})
+    cfg["api"] = merged_api
+    # Deep-merge images_cache block
+    user_img = user_cfg.get("images_cache") if isinstance(user_cfg.get("images_cache"), dict) else {}
+    merged_img = DEFAULT_CONFIG.get("images_cache", {}).copy()
+    merged_img.update(user_img or {})
+    cfg["images_cache"] = merged_img
     # Normalize logs
     logs = []
     for item in cfg.get("logs", []) or []:
@@ -103,7 +145,13 @@ def load_config(path: str = "config.json") -> Dict[str, Any]:
         path = str(item.get("path") or "")
         if not name or not path:
             continue
-        logs.append({"name": name, "path": path})
+        entry = {"name": name, "path": path}
+        # Optional per-log timestamp extraction for time-range queries and
+        # a glob of rotated members (auth.log.1, auth.log.2.gz, ...)
+        for key in ("time_regex", "time_format", "rotated"):
+            if isinstance(item.get(key), str) and item[key]:
+                entry[key] = item[key]
+        logs.append(entry)
     cfg["logs"] = logs
     return cfg
 
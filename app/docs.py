@@ -106,10 +106,18 @@ def _openapi_spec() -> dict:
                 "get": {
                     "tags": ["Profiles"],
                     "summary": "Ping SSH connectivity",
-                    "description": "Attempt a lightweight SSH connection to verify credentials.",
+                    "description": "Return the latest result of the background health monitor (ok, latency_ms, circuit). Pass fresh=1 to probe immediately.",
                     "responses": {"200": {"description": "OK"}},
                 }
             },
+            "/api/run": {
+                "post": {
+                    "tags": ["Profiles"],
+                    "summary": "Run selected profiles in parallel",
+                    "description": "Tail every registered path of the given SSH profiles concurrently. Body: {profile_ids: [..], lines: N}. Streams NDJSON events (profile, image, file, error, done) as each file finishes.",
+                    "responses": {"200": {"description": "NDJSON stream"}},
+                }
+            },
             "/api/profiles/{id}/list": {
                 "get": {
                     "tags": ["Profiles"],
@@ -122,10 +130,26 @@ def _openapi_spec() -> dict:
                 "get": {
                     "tags": ["Profiles"],
                     "summary": "Tail remote file",
-                    "description": "Fetch the last N lines from a remote file using the profile's connection settings.",
+                    "description": "Fetch the last N lines from a remote file using the profile's connection settings. Pass stream=1 (NDJSON) or stream=sse to receive line batches as they arrive; max_bytes bounds the transfer. Single-file patterns given cursor= return an opaque cursor; pass it back as cursor to fetch only lines appended since (reset=true after rotation or truncation).",
+                    "responses": {"200": {"description": "OK"}},
+                }
+            },
+            "/api/profiles/{id}/cat_many": {
+                "get": {
+                    "tags": ["Profiles"],
+                    "summary": "Tail all files matching a glob",
+                    "description": "Expand a remote glob and tail every matching text file with the grep chain in a single SSH exec. Returns one entry per file.",
                     "responses": {"200": {"description": "OK"}},
                 }
             },
+            "/api/profiles/{id}/follow": {
+                "get": {
+                    "tags": ["Profiles"],
+                    "summary": "Follow remote file",
+                    "description": "Keep a remote tail -F open and push new lines as Server-Sent Events. Honours grep/cmd_suffix or a registered path_id; identical queries share one SSH channel and heartbeats are sent while idle.",
+                    "responses": {"200": {"description": "OK"}, "429": {"description": "Too many follow channels"}},
+                }
+            },
             "/api/records": {
                 "get": {
                     "tags": ["Records"],
@@ -170,6 +194,22 @@ def _openapi_spec() -> dict:
                     "responses": {"200": {"description": "OK"}},
                 }
             },
+            "/api/records/{id}/images_remote": {
+                "post": {
+                    "tags": ["Records"],
+                    "summary": "Attach many remote images",
+                    "description": "Fetch a list of remote images over SFTP in parallel, attach them to the record in one transaction and stream NDJSON progress per image.",
+                    "responses": {"200": {"description": "OK"}},
+                }
+            },
+            "/api/images_cache": {
+                "get": {
+                    "tags": ["Records"],
+                    "summary": "Image cache statistics",
+                    "description": "Entries, bytes used, hit/miss, eviction and expiry counters of the in-memory remote image cache.",
+                    "responses": {"200": {"description": "OK"}},
+                }
+            },
             "/record_images/{iid}": {
                 "delete": {
                     "tags": ["Records"],
@@ -0,0 +1,161 @@
+import codecs
+import queue
+import socket
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import load_config
+from .ssh_pool import get_pool
+
+
+_log = logging.getLogger(__name__)
+
+
+class _Follower:
+    """One long-lived remote ``tail -F`` channel fanned out to many subscribers."""
+
+    def __init__(self, hub: "FollowHub", key: Tuple[Any, ...], prof: Dict[str, Any], command: str, timeout: int):
+        self.hub = hub
+        self.key = key
+        self.prof = prof
+        self.command = command
+        self.timeout = timeout
+        self.subscribers: List["queue.Queue[Dict[str, Any]]"] = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"follow-{prof.get('id')}", daemon=True)
+
+    def _publish(self, frame: Dict[str, Any]) -> None:
+        with self.hub._lock:
+            subs = list(self.subscribers)
+        for q in subs:
+            try:
+                q.put_nowait(frame)
+            except queue.Full:
+                # Slow consumer: drop its oldest frame rather than stall everyone;
+                # the marker rides on the new frame so it needs just the one slot
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    q.put_nowait({**frame, "dropped": True})
+                except queue.Full:
+                    pass
+
+    def _run(self) -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        end: Dict[str, Any] = {"done": True}
+        try:
+            with get_pool().channel(self.prof, timeout=self.timeout) as ch:
+                ch.exec_command(self.command)
+                # Short reads so we notice when the last subscriber leaves
+                ch.settimeout(1.0)
+                while not self.stopped.is_set():
+                    try:
+                        chunk = ch.recv(32768)
+                    except socket.timeout:
+                        continue
+                    if not chunk:
+                        break
+                    parts = (pending + decoder.decode(chunk)).split("\n")
+                    pending = parts.pop()
+                    lines = [ln.rstrip("\r") for ln in parts]
+                    if lines:
+                        self._publish({"lines": lines})
+                if not self.stopped.is_set():
+                    ch.settimeout(self.timeout)
+                    code = ch.recv_exit_status()
+                    err = b""
+                    while ch.recv_stderr_ready():
+                        err += ch.recv_stderr(32768)
+                    end["code"] = code
+                    if code != 0:
+                        end["error"] = err.decode("utf-8", errors="replace") or f"exit status {code}"
+        except Exception as e:
+            end["error"] = str(e)
+        finally:
+            self.hub._retire(self)
+            self._publish(end)
+            # Subscribers also watch this, so the end does not depend on a queue slot
+            self.stopped.set()
+            _log.info("Follow ended for profile %s: %s", self.prof.get("id"), self.command)
+
+
+class FollowHub:
+    """Share remote follow channels between all subscribers of the same query.
+
+    Subscribers of an identical (profile, command) pair read from a single
+    SSH channel on the pooled transport; the channel is closed once the last
+    subscriber unsubscribes.
+    """
+
+    def __init__(self, max_per_profile: int = 4, queue_size: int = 256):
+        self.max_per_profile = max(1, max_per_profile)
+        self.queue_size = queue_size
+        self._followers: Dict[Tuple[Any, ...], _Follower] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self, prof: Dict[str, Any], command: str, timeout: int = 15
+    ) -> Tuple["queue.Queue[Dict[str, Any]]", threading.Event]:
+        """Return ``(frames, stopped)``; ``stopped`` is set once the channel has ended."""
+        key = (int(prof["id"]), command)
+        q: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            fol = self._followers.get(key)
+            if fol is None:
+                active = sum(1 for k in self._followers if k[0] == key[0])
+                if active >= self.max_per_profile:
+                    raise RuntimeError("too many concurrent follow channels for profile")
+                fol = _Follower(self, key, prof, command, timeout)
+                self._followers[key] = fol
+                fol.subscribers.append(q)
+                fol.thread.start()
+            else:
+                fol.subscribers.append(q)
+        return q, fol.stopped
+
+    def unsubscribe(self, prof_id: int, command: str, q: "queue.Queue[Dict[str, Any]]") -> None:
+        key = (int(prof_id), command)
+        with self._lock:
+            fol = self._followers.get(key)
+            if fol is None:
+                return
+            try:
+                fol.subscribers.remove(q)
+            except ValueError:
+                pass
+            if not fol.subscribers:
+                self._followers.pop(key, None)
+                fol.stopped.set()
+
+    def _retire(self, fol: _Follower) -> None:
+        with self._lock:
+            if self._followers.get(fol.key) is fol:
+                self._followers.pop(fol.key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "channels": len(self._followers),
+                "subscribers": sum(len(f.subscribers) for f in self._followers.values()),
+            }
+
+
+_HUB: Optional[FollowHub] = None
+_HUB_LOCK = threading.Lock()
+
+
+def get_follow_hub() -> FollowHub:
+    global _HUB
+    with _HUB_LOCK:
+        if _HUB is None:
+            try:
+                cfg = load_config()
+                api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+                _HUB = FollowHub(max_per_profile=int(api_cfg.get("follow_max_per_profile", 4)))
+            except Exception:
+                _HUB = FollowHub()
+        return _HUB
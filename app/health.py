@@ -0,0 +1,155 @@
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .config import load_config
+from .db import get_db, row_to_dict
+from .ssh_pool import get_pool
+
+
+_log = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Probe every SSH profile in the background and act as circuit breaker.
+
+    The latest ``{ok, latency_ms, error, checked, failures}`` per profile is
+    kept in memory so ``/ping`` answers without touching the network. Once a
+    profile has ``threshold`` consecutive failures (from probes or from
+    failed connects during normal requests) the circuit opens and the pool
+    refuses new channels to it until a probe succeeds again.
+    """
+
+    def __init__(self, interval: int = 30, threshold: int = 1, timeout: int = 15, workers: int = 8):
+        self.interval = max(5, interval)
+        self.threshold = max(1, threshold)
+        self.timeout = timeout
+        self.workers = max(1, workers)
+        self._status: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ------------- breaker interface (used by SSHPool) -------------
+    def check(self, pid: int) -> Optional[str]:
+        """Return why ``pid`` is short-circuited, or None when it may be used."""
+        with self._lock:
+            st = self._status.get(int(pid))
+            if not st or st["ok"] or st["failures"] < self.threshold:
+                return None
+            return f"host unavailable (circuit open): {st.get('error') or 'probe failed'}"
+
+    def failed(self, pid: int, error: str) -> None:
+        with self._lock:
+            st = self._status.setdefault(int(pid), {"failures": 0})
+            st.update(ok=False, error=error, checked=int(time.time()), failures=st.get("failures", 0) + 1)
+            st.setdefault("latency_ms", None)
+
+    # ------------- probing -------------
+    def probe(self, prof: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a no-op on the pooled transport and record the outcome."""
+        pid = int(prof["id"])
+        started = time.time()
+        try:
+            # Plain "true" without a login shell: we only care about the transport
+            res = get_pool().exec(prof, "true", timeout=self.timeout, gated=False)
+            ok = bool(res.get("ok"))
+            err = None if ok else (res.get("err") or f"exit status {res.get('code')}")
+        except Exception as e:
+            ok, err = False, str(e)
+        latency = int((time.time() - started) * 1000)
+        with self._lock:
+            prev = self._status.get(pid) or {}
+            st = {
+                "ok": ok,
+                "latency_ms": latency if ok else None,
+                "error": err,
+                "checked": int(time.time()),
+                "failures": 0 if ok else prev.get("failures", 0) + 1,
+            }
+            self._status[pid] = st
+        if ok and prev and not prev.get("ok"):
+            _log.info("Profile %s is reachable again (%d ms)", pid, latency)
+        elif not ok and (not prev or prev.get("ok")):
+            _log.warning("Profile %s is unreachable: %s", pid, err)
+        return dict(st)
+
+    def _ssh_profiles(self) -> List[Dict[str, Any]]:
+        conn = get_db()
+        rows = conn.execute("SELECT * FROM profiles WHERE lower(protocol)='ssh'").fetchall()
+        conn.close()
+        return [row_to_dict(r) for r in rows]
+
+    def probe_all(self) -> None:
+        try:
+            profiles = self._ssh_profiles()
+        except Exception:
+            _log.exception("Health monitor could not load profiles")
+            return
+        known = {int(p["id"]) for p in profiles}
+        with self._lock:
+            for pid in [k for k in self._status if k not in known]:
+                self._status.pop(pid, None)
+        if not profiles:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(profiles)), thread_name_prefix="health") as ex:
+            list(ex.map(self.probe, profiles))
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.probe_all()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ssh-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ------------- queries -------------
+    def status(self, pid: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            st = self._status.get(int(pid))
+            if st is None:
+                return None
+            circuit = "open" if (not st["ok"] and st["failures"] >= self.threshold) else "closed"
+            return {**st, "circuit": circuit}
+
+    def forget(self, pid: int) -> None:
+        """Drop the cached status (e.g. after the profile's settings changed)."""
+        with self._lock:
+            self._status.pop(int(pid), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {str(pid): dict(st) for pid, st in self._status.items()}
+
+
+_MONITOR: Optional[HealthMonitor] = None
+_MONITOR_LOCK = threading.Lock()
+
+
+def get_health_monitor() -> HealthMonitor:
+    """Return the process-wide monitor; starts it and installs it as the pool's breaker."""
+    global _MONITOR
+    with _MONITOR_LOCK:
+        if _MONITOR is None:
+            try:
+                cfg = load_config()
+                api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+                _MONITOR = HealthMonitor(
+                    interval=int(api_cfg.get("health_interval", 30)),
+                    threshold=int(api_cfg.get("health_fail_threshold", 1)),
+                    timeout=int(api_cfg.get("ssh_timeout", 15)),
+                )
+            except Exception:
+                _MONITOR = HealthMonitor()
+            get_pool().breaker = _MONITOR
+            _MONITOR.start()
+        return _MONITOR
@@ -0,0 +1,443 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from io import BytesIO
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .config import load_config
+from .db import DB_DIR
+
+
+_log = logging.getLogger(__name__)
+
+
+class LRUBytesCache:
+    """Thread-safe LRU of byte blobs with a byte budget and TTL.
+
+    Entries live in an ``OrderedDict`` in recency order and a running byte
+    total is kept, so get, put and each eviction are O(1). Expired entries
+    are dropped when touched; the budget is enforced on every put.
+    """
+
+    def __init__(self, max_bytes: int = 20 * 1024 * 1024, ttl: int = 60):
+        self.max_bytes = max(0, max_bytes)
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            ts, data = item
+            if self.ttl > 0 and time.time() - ts > self.ttl:
+                del self._data[key]
+                self._bytes -= len(data)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Hashable, data: bytes) -> None:
+        size = len(data)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            if size > self.max_bytes:
+                # Would evict everything else and still not fit
+                return
+            self._data[key] = (time.time(), data)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None:
+                self._bytes -= len(item[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class DiskBlobCache:
+    """Content-addressed on-disk image store with its own byte budget.
+
+    Blobs are stored once under ``blobs/<sha[:2]>/<sha>`` and indexed by
+    (profile, remote path, remote size, remote mtime), so a remote ``stat``
+    is enough to tell whether the cached copy still matches. When the total
+    exceeds ``max_bytes`` the least recently used blobs are swept.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, size INTEGER NOT NULL, atime REAL NOT NULL)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                profile_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                rsize INTEGER NOT NULL,
+                rmtime INTEGER NOT NULL,
+                sha TEXT NOT NULL,
+                PRIMARY KEY (profile_id, path)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_atime ON blobs(atime)")
+        conn.commit()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, "blobs", sha[:2], sha)
+
+    def get(self, prof_id: int, path: str, rsize: int, rmtime: int) -> Optional[bytes]:
+        """Return cached bytes if the remote file still has this size and mtime."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT sha FROM entries WHERE profile_id=? AND path=? AND rsize=? AND rmtime=?",
+                    (int(prof_id), path, int(rsize), int(rmtime)),
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                try:
+                    with open(self._blob_path(row["sha"]), "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    conn.execute("DELETE FROM entries WHERE sha=?", (row["sha"],))
+                    conn.execute("DELETE FROM blobs WHERE sha=?", (row["sha"],))
+                    conn.commit()
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE blobs SET atime=? WHERE sha=?", (time.time(), row["sha"]))
+                conn.commit()
+                self.hits += 1
+                return data
+            finally:
+                conn.close()
+
+    def lookup_sha(self, prof_id: int, path: str, rsize: int, rmtime: int) -> Optional[str]:
+        """Return the content hash recorded for this remote file version, if any."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT sha FROM entries WHERE profile_id=? AND path=? AND rsize=? AND rmtime=?",
+                    (int(prof_id), path, int(rsize), int(rmtime)),
+                ).fetchone()
+            finally:
+                conn.close()
+        return row["sha"] if row else None
+
+    def put(self, prof_id: int, path: str, rsize: int, rmtime: int, data: bytes) -> str:
+        """Store ``data`` and point (profile, path) at it; returns the SHA-256."""
+        sha = hashlib.sha256(data).hexdigest()
+        if len(data) > self.max_bytes:
+            return sha
+        blob = self._blob_path(sha)
+        with self._lock:
+            if not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                tmp = f"{blob}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, blob)
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO blobs(sha, size, atime) VALUES(?,?,?)", (sha, len(data), time.time())
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries(profile_id, path, rsize, rmtime, sha) VALUES(?,?,?,?,?)",
+                    (int(prof_id), path, int(rsize), int(rmtime), sha),
+                )
+                conn.commit()
+                self._sweep(conn)
+            finally:
+                conn.close()
+        return sha
+
+    def _sweep(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row in conn.execute("SELECT sha, size FROM blobs ORDER BY atime").fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._blob_path(row["sha"]))
+            except FileNotFoundError:
+                pass
+            conn.execute("DELETE FROM entries WHERE sha=?", (row["sha"],))
+            conn.execute("DELETE FROM blobs WHERE sha=?", (row["sha"],))
+            total -= row["size"]
+            self.evictions += 1
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            try:
+                n, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            finally:
+                conn.close()
+            return {
+                "blobs": n,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Edges thumbnails are rendered at; requested sizes round up to one of these
+THUMB_SIZES = (64, 128, 256, 512, 1024)
+
+
+def thumb_size(requested: int) -> int:
+    """Smallest supported edge at least ``requested`` (capped at the largest)."""
+    for size in THUMB_SIZES:
+        if requested <= size:
+            return size
+    return THUMB_SIZES[-1]
+
+
+class ThumbnailStore:
+    """Downscaled previews on disk, keyed by source content hash and max edge.
+
+    Kept under ``max_bytes``: file mtimes record the last use and the
+    least recently used thumbnails are removed when a write goes over.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 64 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max(0, max_bytes)
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._total = sum(size for _, _, size in self._files())
+
+    def _files(self) -> List[Tuple[float, str, int]]:
+        """``(mtime, path, size)`` of every stored thumbnail."""
+        out: List[Tuple[float, str, int]] = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                out.append((st.st_mtime, path, st.st_size))
+        return out
+
+    def _path(self, sha: str, size: int) -> str:
+        return os.path.join(self.root, sha[:2], f"{sha}_{size}")
+
+    def get(self, sha: str, size: int) -> Optional[Tuple[bytes, str]]:
+        """Return ``(bytes, mimetype)`` of a stored thumbnail."""
+        base = self._path(sha, size)
+        for ext, mime in ((".webp", "image/webp"), (".jpg", "image/jpeg")):
+            try:
+                with open(base + ext, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            try:
+                os.utime(base + ext)  # mtime doubles as last-use time for eviction
+            except OSError:
+                pass
+            with self._lock:
+                self.hits += 1
+            return data, mime
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, sha: str, size: int, data: bytes, mimetype: str) -> None:
+        if len(data) > self.max_bytes:
+            return
+        base = self._path(sha, size)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        path = base + (".webp" if mimetype == "image/webp" else ".jpg")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        with self._lock:
+            try:
+                self._total -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp, path)
+            self._total += len(data)
+            if self._total > self.max_bytes:
+                self._sweep()
+
+    def _sweep(self) -> None:
+        files = sorted(self._files())
+        self._total = sum(size for _, _, size in files)
+        for _, path, size in files:
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def make_thumbnail(data: bytes, size: int) -> Optional[Tuple[bytes, str]]:
+    """Downscale image bytes to fit ``size`` x ``size``; returns ``(bytes, mimetype)``.
+
+    Encodes WebP when Pillow supports it, JPEG otherwise. Returns None if
+    the image cannot be decoded (e.g. SVG), so callers can fall back to the
+    original bytes.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except Exception:
+        return None
+    try:
+        with Image.open(BytesIO(data)) as im:
+            im = ImageOps.exif_transpose(im)
+            im.thumbnail((size, size))
+            out = BytesIO()
+            try:
+                if im.mode not in ("RGB", "RGBA"):
+                    im = im.convert("RGBA" if "A" in im.getbands() else "RGB")
+                im.save(out, format="WEBP", quality=80, method=4)
+                return out.getvalue(), "image/webp"
+            except (KeyError, OSError):
+                out = BytesIO()
+                im.convert("RGB").save(out, format="JPEG", quality=82, optimize=True)
+                return out.getvalue(), "image/jpeg"
+    except Exception:
+        _log.debug("Thumbnail generation failed", exc_info=True)
+        return None
+
+
+_CACHE: Optional[LRUBytesCache] = None
+_CACHE_LOCK = threading.Lock()
+_DISK: Optional[DiskBlobCache] = None
+# Whether _DISK reflects the config: None is also a settled answer (disabled or unavailable)
+_DISK_READY = False
+_THUMBS: Optional[ThumbnailStore] = None
+
+
+def get_image_cache() -> LRUBytesCache:
+    """Return the process-wide remote image cache, configured once from ``images_cache``."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                cfg = load_config()
+                img_cfg = cfg.get("images_cache") if isinstance(cfg.get("images_cache"), dict) else {}
+                _CACHE = LRUBytesCache(
+                    max_bytes=int(img_cfg.get("max_bytes", 20 * 1024 * 1024)),
+                    ttl=int(img_cfg.get("ttl", 60)),
+                )
+            except Exception:
+                _CACHE = LRUBytesCache()
+        return _CACHE
+
+
+def get_image_disk_cache() -> Optional[DiskBlobCache]:
+    """Return the on-disk image tier under ``data/image_cache``, or None when disabled.
+
+    The outcome (including disabled or failed setup) is decided once, like
+    every ``images_cache`` setting; changes need a restart.
+    """
+    global _DISK, _DISK_READY
+    with _CACHE_LOCK:
+        if not _DISK_READY:
+            _DISK_READY = True
+            try:
+                cfg = load_config()
+                img_cfg = cfg.get("images_cache") if isinstance(cfg.get("images_cache"), dict) else {}
+                max_bytes = int(img_cfg.get("disk_max_bytes", 512 * 1024 * 1024))
+                if max_bytes > 0:
+                    _DISK = DiskBlobCache(os.path.join(DB_DIR, "image_cache"), max_bytes=max_bytes)
+            except Exception:
+                _log.exception("Disk image cache unavailable")
+        return _DISK
+
+
+
+def get_thumbnail_store() -> ThumbnailStore:
+    global _THUMBS
+    with _CACHE_LOCK:
+        if _THUMBS is None:
+            try:
+                cfg = load_config()
+                img_cfg = cfg.get("images_cache") if isinstance(cfg.get("images_cache"), dict) else {}
+                max_bytes = int(img_cfg.get("thumb_max_bytes", 64 * 1024 * 1024))
+            except Exception:
+                max_bytes = 64 * 1024 * 1024
+            _THUMBS = ThumbnailStore(os.path.join(DB_DIR, "image_cache", "thumbs"), max_bytes=max_bytes)
+        return _THUMBS
@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import load_config
+from .ssh_pool import get_pool
+
+
+_log = logging.getLogger(__name__)
+
+_GLOB_CHARS = set("*?[")
+
+
+def _static_prefix(pattern: str) -> str:
+    """Return the deepest directory of ``pattern`` that contains no glob characters."""
+    parts = pattern.split("/")
+    fixed: List[str] = []
+    for part in parts[:-1]:
+        if _GLOB_CHARS & set(part):
+            break
+        fixed.append(part)
+    prefix = "/".join(fixed)
+    if not prefix:
+        return "/" if pattern.startswith("/") else "."
+    return prefix
+
+
+def _watch_dirs(pattern: str, files: List[str]) -> Optional[List[str]]:
+    """Directories whose mtimes change whenever the glob's result can, or None.
+
+    A file appearing or disappearing changes its directory's mtime. That
+    only covers every candidate when wildcards sit in the last component:
+    for ``/var/log/*/app.log`` a new match in a subdirectory that had none
+    before touches no watched directory, so such globs rely on the TTL.
+    """
+    if _GLOB_CHARS & set(os.path.dirname(pattern)):
+        return None
+    dirs = {_static_prefix(pattern)}
+    for f in files:
+        dirs.add(os.path.dirname(f) or ".")
+    return sorted(dirs)
+
+
+class _Entry:
+    def __init__(self, files: List[str], checked: float, mtimes: Optional[Dict[str, int]]):
+        self.files = files
+        self.checked = checked
+        self.mtimes = mtimes
+
+
+class ListCache:
+    """Cache of expanded remote globs keyed by (profile, pattern, kind, limit).
+
+    Entries younger than ``ttl`` are served as-is. Older entries are
+    revalidated by stat-ing the watched directories over SFTP; if none of
+    their mtimes changed the entry is kept, otherwise the glob is re-run.
+    Globs with wildcards in a directory component are re-run after ``ttl``.
+    At most ``max_entries`` globs are kept; the least recently used goes first.
+    """
+
+    def __init__(self, ttl: int = 30, max_entries: int = 256):
+        self.ttl = max(0, ttl)
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[int, str, str, int], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _stat_dirs(self, prof: Dict[str, Any], dirs: List[str], timeout: int) -> Optional[Dict[str, int]]:
+        """Return ``{dir: mtime}``, or None if any directory cannot be stat'ed reliably."""
+        if any(d.startswith("~") or "$" in d for d in dirs):
+            return None
+        now = time.time()
+        out: Dict[str, int] = {}
+        try:
+            with get_pool().sftp(prof, timeout=timeout) as sftp:
+                for d in dirs:
+                    mtime = int(sftp.stat(d).st_mtime or 0)
+                    # mtimes have 1s resolution: a change in this same second could go unseen
+                    if mtime >= int(now) - 1:
+                        return None
+                    out[d] = mtime
+        except Exception:
+            return None
+        return out
+
+    def get(
+        self,
+        prof: Dict[str, Any],
+        pattern: str,
+        kind: str,
+        limit: int,
+        fetch: Callable[[], Dict[str, Any]],
+        timeout: int = 15,
+    ) -> Dict[str, Any]:
+        """Return ``{ok, files|error, cached}`` for the glob, calling ``fetch`` on a miss."""
+        key = (int(prof["id"]), pattern, kind, limit)
+        if self.ttl <= 0:
+            return {**fetch(), "cached": False}
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now - entry.checked < self.ttl:
+                    self.hits += 1
+                    return {"ok": True, "files": list(entry.files), "cached": True}
+        if entry is not None and entry.mtimes is not None:
+            current = self._stat_dirs(prof, list(entry.mtimes), timeout)
+            if current == entry.mtimes:
+                with self._lock:
+                    entry.checked = now
+                    self.revalidated += 1
+                return {"ok": True, "files": list(entry.files), "cached": True}
+        with self._lock:
+            self.misses += 1
+        res = fetch()
+        if not res.get("ok"):
+            return {**res, "cached": False}
+        files = list(res.get("files") or [])
+        watch = _watch_dirs(pattern, files)
+        mtimes = self._stat_dirs(prof, watch, timeout) if watch is not None else None
+        with self._lock:
+            self._entries[key] = _Entry(files, time.time(), mtimes)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return {**res, "cached": False}
+
+    def invalidate(self, prof_id: Optional[int] = None) -> None:
+        """Forget cached globs of one profile (or all when ``prof_id`` is None)."""
+        with self._lock:
+            if prof_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == int(prof_id)]:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+            }
+
+
+_CACHE: Optional[ListCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_list_cache() -> ListCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                cfg = load_config()
+                api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+                _CACHE = ListCache(
+                    ttl=int(api_cfg.get("list_cache_ttl", 30)),
+                    max_entries=int(api_cfg.get("list_cache_entries", 256)),
+                )
+            except Exception:
+                _CACHE = ListCache()
+        return _CACHE
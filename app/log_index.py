@@ -0,0 +1,625 @@
+import os
+import re
+import pickle
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, islice
+import time
+import threading
+import logging
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import load_config
+from .db import DB_DIR
+from .logsearch import Range, get_search_executor
+from .logtime import TimestampParser
+
+
+_log = logging.getLogger(__name__)
+
+INDEX_DIR = os.path.join(DB_DIR, "log_index")
+_VERSION = 1
+# Blocks per unit of work handed to a worker process, and batches in flight
+_BATCH = 8
+_INFLIGHT = 16
+
+
+def _trigram_keys(data: bytes) -> Set[int]:
+    data = data.lower()
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def block_postings(path: str, ranges: List[Tuple[int, int]]) -> Dict[int, int]:
+    """Trigram -> bitset over ``ranges`` (bit ``i`` = ``ranges[i]``); runs in a worker process."""
+    out: Dict[int, int] = {}
+    with open(path, "rb") as f:
+        for i, (start, end) in enumerate(ranges):
+            f.seek(start)
+            bit = 1 << i
+            for key in _trigram_keys(f.read(end - start)):
+                out[key] = out.get(key, 0) | bit
+    return out
+
+
+def query_trigrams(literal: str, case: bool) -> Optional[Set[int]]:
+    """Trigrams every line containing ``literal`` must have, or None if too short."""
+    raw = literal.encode("utf-8")
+    if not case:
+        # The index lowers ASCII only; a non-ASCII byte could differ in case
+        # from what is on disk, so drop trigrams touching one
+        keys = {k for k in _trigram_keys(raw) if not any((k >> s) & 0x80 for s in (16, 8, 0))}
+    else:
+        keys = _trigram_keys(raw)
+    return keys or None
+
+
+class TrigramIndex:
+    """Block-level trigram index of one append-only log file.
+
+    The file is cut into newline-aligned blocks of roughly ``block_size``
+    bytes; for each block we keep its byte range and first line number, and
+    for each (ASCII-lowercased) trigram a bitset of the blocks containing
+    it. A substring query only has to scan the blocks whose bitsets all
+    include the query's trigrams.
+    """
+
+    def __init__(self, path: str, block_size: int = 1024 * 1024):
+        self.path = path
+        self.block_size = max(4096, block_size)
+        self.inode: Optional[int] = None
+        self.blocks: List[Range] = []
+        self.postings: Dict[int, int] = {}
+        self.next_line = 1  # number of the first line after the indexed prefix
+
+    @property
+    def indexed_end(self) -> int:
+        return self.blocks[-1][1] if self.blocks else 0
+
+    def _reset(self, inode: Optional[int]) -> None:
+        self.inode = inode
+        self.blocks = []
+        self.postings = {}
+        self.next_line = 1
+
+    def valid_for(self, st: os.stat_result) -> bool:
+        return self.inode == st.st_ino and st.st_size >= self.indexed_end
+
+    def extend(self, stop: Optional[threading.Event] = None, executor: Optional[Executor] = None) -> int:
+        """Index complete lines appended since the last run; returns new blocks.
+
+        Trigram extraction is CPU-bound pure Python, so it runs on
+        ``executor`` (worker processes) in batches of ``_BATCH`` blocks;
+        only the bitset merge stays here. Without an executor the batches
+        run inline, yielding the GIL between them.
+        """
+        st = os.stat(self.path)
+        if not self.valid_for(st):
+            self._reset(st.st_ino)
+        added = 0
+        pending: "deque[Tuple[List[Range], Any]]" = deque()
+
+        def merge(blocks: List[Range], postings: Dict[int, int]) -> None:
+            shift = len(self.blocks)
+            for key, bits in postings.items():
+                self.postings[key] = self.postings.get(key, 0) | (bits << shift)
+            self.blocks.extend(blocks)
+
+        def submit(blocks: List[Range]) -> None:
+            ranges = [(s, e) for s, e, _ in blocks]
+            if executor is None:
+                merge(blocks, block_postings(self.path, ranges))
+                time.sleep(0)
+                return
+            pending.append((blocks, executor.submit(block_postings, self.path, ranges)))
+            while len(pending) >= _INFLIGHT:
+                done, fut = pending.popleft()
+                merge(done, fut.result())
+
+        batch: List[Range] = []
+        with open(self.path, "rb") as f:
+            pos = self.indexed_end
+            f.seek(pos)
+            while pos < st.st_size and not (stop and stop.is_set()):
+                data = f.read(min(self.block_size, st.st_size - pos))
+                if not data:
+                    break
+                nl = data.rfind(b"\n")
+                if nl < 0:
+                    # Line longer than a block: extend to its end
+                    extra = b""
+                    while True:
+                        more = f.read(self.block_size)
+                        if not more:
+                            break
+                        cut = more.find(b"\n")
+                        if cut >= 0:
+                            extra += more[: cut + 1]
+                            break
+                        extra += more
+                    data += extra
+                    if not data.endswith(b"\n"):
+                        break  # unterminated last line; wait for the writer
+                    nl = len(data) - 1
+                block = data[: nl + 1]
+                f.seek(pos + len(block))
+                batch.append((pos, pos + len(block), self.next_line))
+                self.next_line += block.count(b"\n")
+                pos += len(block)
+                added += 1
+                if len(batch) >= _BATCH:
+                    submit(batch)
+                    batch = []
+        try:
+            if batch:
+                submit(batch)
+            while pending:
+                done, fut = pending.popleft()
+                merge(done, fut.result())
+        finally:
+            for _, fut in pending:
+                fut.cancel()
+        return added
+
+    def candidate_ranges(self, keys: Set[int]) -> List[Range]:
+        """Ranges of indexed blocks that may contain every trigram in ``keys``."""
+        if not self.blocks:
+            return []
+        mask = (1 << len(self.blocks)) - 1
+        for key in keys:
+            mask &= self.postings.get(key, 0)
+            if not mask:
+                return []
+        out: List[Range] = []
+        bid = 0
+        while mask:
+            if mask & 1:
+                out.append(self.blocks[bid])
+            mask >>= 1
+            bid += 1
+        return out
+
+    # ------------- persistence -------------
+    def save(self, file: str) -> None:
+        tmp = file + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({
+                "version": _VERSION,
+                "path": self.path,
+                "block_size": self.block_size,
+                "inode": self.inode,
+                "blocks": self.blocks,
+                "next_line": self.next_line,
+                "postings": self.postings,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, file)
+
+    @classmethod
+    def load(cls, file: str, path: str, block_size: int) -> Optional["TrigramIndex"]:
+        try:
+            with open(file, "rb") as f:
+                raw = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if raw.get("version") != _VERSION or raw.get("path") != path or raw.get("block_size") != max(4096, block_size):
+            return None
+        idx = cls(path, block_size)
+        idx.inode = raw["inode"]
+        idx.blocks = raw["blocks"]
+        idx.next_line = raw["next_line"]
+        idx.postings = raw["postings"]
+        return idx
+
+
+class LineIndex:
+    """Sparse line-offset index: the byte offset of every ``step``-th line.
+
+    ``offsets[i]`` is where line ``i * step + 1`` starts, so any line can be
+    reached by seeking to the nearest checkpoint and skipping fewer than
+    ``step`` lines. Only complete (newline-terminated) lines are indexed;
+    ``extend`` picks up whatever was appended since the last call.
+    """
+
+    def __init__(self, path: str, step: int = 1000):
+        self.path = path
+        self.step = max(1, step)
+        self.inode: Optional[int] = None
+        self.offsets = array("Q", [0])
+        self.indexed_end = 0  # byte offset just past the last indexed line
+        self.lines = 0  # complete lines before ``indexed_end``
+
+    def _reset(self, inode: Optional[int]) -> None:
+        self.inode = inode
+        self.offsets = array("Q", [0])
+        self.indexed_end = 0
+        self.lines = 0
+
+    def extend(self) -> bool:
+        """Index lines appended since the last call; returns True if it changed."""
+        st = os.stat(self.path)
+        changed = False
+        if self.inode != st.st_ino or st.st_size < self.indexed_end:
+            self._reset(st.st_ino)
+            changed = True
+        if st.st_size == self.indexed_end:
+            return changed
+        with open(self.path, "rb") as f:
+            f.seek(self.indexed_end)
+            carry = b""
+            while True:
+                chunk = f.read(4 * 1024 * 1024)
+                if not chunk:
+                    break
+                data = carry + chunk
+                cut = data.rfind(b"\n")
+                if cut < 0:
+                    carry = data
+                    continue
+                carry = data[cut + 1:]
+                pieces = data[: cut + 1].split(b"\n")[:-1]
+                base = self.indexed_end
+                # Offset at which each line *after* these pieces starts
+                ends = accumulate((len(p) + 1 for p in pieces), initial=base)
+                # ends[j] starts line ``self.lines + 1 + j``; checkpoints are lines k * step + 1
+                first = (-self.lines) % self.step or self.step
+                self.offsets.extend(islice(ends, first, len(pieces) + 1, self.step))
+                self.lines += len(pieces)
+                self.indexed_end = base + cut + 1
+                changed = True
+        return changed
+
+    def locate(self, line: int) -> Tuple[int, int]:
+        """Return ``(byte offset, line number)`` of the checkpoint at or before ``line``."""
+        slot = min(max(0, (line - 1) // self.step), len(self.offsets) - 1)
+        return self.offsets[slot], slot * self.step + 1
+
+    def line_at(self, offset: int) -> int:
+        """Number of lines before ``offset``, which must be a line start inside the index."""
+        slot = bisect_right(self.offsets, offset) - 1
+        start = self.offsets[slot]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            n = 0
+            pos = start
+            while pos < offset:
+                data = f.read(min(1024 * 1024, offset - pos))
+                if not data:
+                    break
+                n += data.count(b"\n")
+                pos += len(data)
+        return slot * self.step + n
+
+    def total_lines(self) -> int:
+        """Line count including an unterminated last line."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return self.lines
+        return self.lines + (1 if size > self.indexed_end else 0)
+
+    def save(self, file: str) -> None:
+        tmp = file + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({
+                "version": _VERSION,
+                "path": self.path,
+                "step": self.step,
+                "inode": self.inode,
+                "offsets": self.offsets,
+                "indexed_end": self.indexed_end,
+                "lines": self.lines,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, file)
+
+    @classmethod
+    def load(cls, file: str, path: str, step: int) -> Optional["LineIndex"]:
+        try:
+            with open(file, "rb") as f:
+                raw = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if raw.get("version") != _VERSION or raw.get("path") != path or raw.get("step") != max(1, step):
+            return None
+        idx = cls(path, step)
+        idx.inode = raw["inode"]
+        idx.offsets = raw["offsets"]
+        idx.indexed_end = raw["indexed_end"]
+        idx.lines = raw["lines"]
+        return idx
+
+
+class TimeIndex:
+    """Sparse timestamp index: one ``(offset, line, ts)`` sample per block.
+
+    At every ``block_size`` boundary the first line carrying a parseable
+    timestamp is sampled. Logs are (nearly) chronological, so a binary
+    search over the samples bounds the byte range holding a time window.
+    Only whole blocks are sampled; the tail after ``indexed_end`` is always
+    included in a range reaching past the last sample.
+    """
+
+    def __init__(self, path: str, parser: TimestampParser, block_size: int = 1024 * 1024):
+        self.path = path
+        self.parser = parser
+        self.block_size = max(4096, block_size)
+        self.inode: Optional[int] = None
+        self.samples: List[Tuple[int, int, float]] = []
+        self.indexed_end = 0
+        self.lines = 0  # lines before ``indexed_end``
+
+    def _reset(self, inode: Optional[int]) -> None:
+        self.inode = inode
+        self.samples = []
+        self.indexed_end = 0
+        self.lines = 0
+
+    def extend(self) -> bool:
+        """Sample the whole blocks appended since the last call."""
+        st = os.stat(self.path)
+        changed = False
+        if self.inode != st.st_ino or st.st_size < self.indexed_end:
+            self._reset(st.st_ino)
+            changed = True
+        with open(self.path, "rb") as f:
+            while st.st_size - self.indexed_end >= self.block_size:
+                f.seek(self.indexed_end)
+                data = f.read(self.block_size)
+                cut = data.rfind(b"\n")
+                if cut < 0:
+                    break  # a single line longer than a block; wait for more data
+                block = data[: cut + 1]
+                pos, line = 0, self.lines
+                while pos < len(block):
+                    nl = block.find(b"\n", pos)
+                    ts = self.parser.parse(block[pos:nl].decode("utf-8", errors="replace"))
+                    if ts is not None:
+                        self.samples.append((self.indexed_end + pos, line + 1, ts))
+                        break
+                    pos, line = nl + 1, line + 1
+                self.lines += block.count(b"\n")
+                self.indexed_end += len(block)
+                changed = True
+        return changed
+
+    def range_for(self, start: Optional[float], end: Optional[float]) -> Range:
+        """Byte range ``(lo, hi, first line)`` that holds every line in ``[start, end]``."""
+        lo, line = 0, 1
+        stamps = [s[2] for s in self.samples]
+        if start is not None and stamps:
+            i = bisect_left(stamps, start) - 1
+            if i >= 0:
+                lo, line = self.samples[i][0], self.samples[i][1]
+        hi = os.path.getsize(self.path)
+        if end is not None and stamps:
+            j = bisect_right(stamps, end)
+            if j < len(self.samples) and self.samples[j][0] > lo:
+                hi = self.samples[j][0]
+        return lo, hi, line
+
+    def save(self, file: str) -> None:
+        tmp = file + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({
+                "version": _VERSION,
+                "path": self.path,
+                "block_size": self.block_size,
+                "time_regex": self.parser.regex.pattern if self.parser.regex else None,
+                "time_format": self.parser.fmt,
+                "inode": self.inode,
+                "samples": self.samples,
+                "indexed_end": self.indexed_end,
+                "lines": self.lines,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, file)
+
+    @classmethod
+    def load(cls, file: str, path: str, parser: TimestampParser, block_size: int) -> Optional["TimeIndex"]:
+        try:
+            with open(file, "rb") as f:
+                raw = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if (
+            raw.get("version") != _VERSION
+            or raw.get("path") != path
+            or raw.get("block_size") != max(4096, block_size)
+            or raw.get("time_regex") != (parser.regex.pattern if parser.regex else None)
+            or raw.get("time_format") != parser.fmt
+        ):
+            return None
+        idx = cls(path, parser, block_size)
+        idx.inode = raw["inode"]
+        idx.samples = raw["samples"]
+        idx.indexed_end = raw["indexed_end"]
+        idx.lines = raw["lines"]
+        return idx
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name) or "log"
+
+
+class LogIndexManager:
+    """Owns the trigram and line indexes of the configured logs.
+
+    ``refresh`` schedules a background trigram extension when the file has
+    grown; searches use the last completed snapshot and scan the
+    not-yet-indexed tail directly, so they never wait for indexing. Line
+    indexes are built lazily on first use and extended synchronously,
+    which only reads the bytes appended since the previous request.
+    """
+
+    def __init__(self, block_size: int = 1024 * 1024, min_size: int = 8 * 1024 * 1024,
+                 trigrams: bool = True, line_step: int = 1000, workers: int = 1, max_builds: int = 2):
+        self.block_size = block_size
+        self.min_size = min_size
+        self.trigrams = trigrams
+        self.line_step = line_step
+        # Trigram extraction runs on the shared search process pool
+        self.workers = workers
+        # Logs indexed at the same time; further builds wait for a slot
+        self._build_slots = threading.BoundedSemaphore(max(1, max_builds))
+        self._indexes: Dict[str, TrigramIndex] = {}
+        self._building: Set[str] = set()
+        self._line_indexes: Dict[str, LineIndex] = {}
+        self._time_indexes: Dict[str, TimeIndex] = {}
+        self._name_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _file(self, name: str, kind: str = "trigram") -> str:
+        return os.path.join(INDEX_DIR, _safe_name(name) + "." + kind)
+
+    def _build(self, name: str, path: str) -> None:
+        self._build_slots.acquire()
+        try:
+            with self._lock:
+                idx = self._indexes.get(name)
+            if idx is None or idx.path != path:
+                idx = TrigramIndex.load(self._file(name), path, self.block_size) or TrigramIndex(path, self.block_size)
+            # Work on a copy so concurrent searches keep a consistent snapshot
+            work = TrigramIndex(path, self.block_size)
+            work.inode, work.blocks, work.next_line = idx.inode, list(idx.blocks), idx.next_line
+            work.postings = dict(idx.postings)
+            added = work.extend(self._stop, get_search_executor(self.workers))
+            with self._lock:
+                self._indexes[name] = work
+            if added:
+                os.makedirs(INDEX_DIR, exist_ok=True)
+                work.save(self._file(name))
+                _log.info("Indexed %s: %d new blocks (%d total)", name, added, len(work.blocks))
+        except FileNotFoundError:
+            pass
+        except Exception:
+            _log.exception("Building search index for %s failed", name)
+        finally:
+            self._build_slots.release()
+            with self._lock:
+                self._building.discard(name)
+
+    def refresh(self, name: str, path: str) -> None:
+        """Start a background (re)index of ``name`` if it is behind the file."""
+        if not self.trigrams:
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if st.st_size < self.min_size:
+            return
+        with self._lock:
+            if name in self._building:
+                return
+            idx = self._indexes.get(name)
+            if idx is not None and idx.valid_for(st) and st.st_size - idx.indexed_end < self.block_size:
+                return
+            self._building.add(name)
+        threading.Thread(target=self._build, args=(name, path), name=f"log-index-{name}", daemon=True).start()
+
+    def snapshot(self, name: str, path: str) -> Optional[TrigramIndex]:
+        """Return the current index if it still describes ``path``."""
+        with self._lock:
+            idx = self._indexes.get(name)
+        if idx is None or idx.path != path:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return idx if idx.valid_for(st) else None
+
+    def plan(self, name: str, path: str, literal: Optional[str], case: bool) -> Optional[List[Range]]:
+        """Byte ranges a search for ``literal`` must scan, or None to scan everything."""
+        self.refresh(name, path)
+        if not literal:
+            return None
+        keys = query_trigrams(literal, case)
+        idx = self.snapshot(name, path)
+        if keys is None or idx is None:
+            return None
+        ranges = idx.candidate_ranges(keys)
+        # The tail goes in even when empty: scanning it reports where the
+        # file's lines end without counting the skipped blocks
+        size = os.path.getsize(path)
+        if size >= idx.indexed_end:
+            ranges.append((idx.indexed_end, size, idx.next_line))
+        return ranges
+
+    def line_index(self, name: str, path: str) -> LineIndex:
+        """Return the line index of ``name``, brought up to date with the file."""
+        with self._lock:
+            lock = self._name_locks.setdefault(name, threading.Lock())
+        with lock:
+            idx = self._line_indexes.get(name)
+            if idx is None or idx.path != path:
+                idx = LineIndex.load(self._file(name, "lines"), path, self.line_step) or LineIndex(path, self.line_step)
+                self._line_indexes[name] = idx
+            before = len(idx.offsets)
+            changed = idx.extend()
+            # Persist when checkpoints were added so a restart skips the rescan
+            if changed and len(idx.offsets) != before:
+                try:
+                    os.makedirs(INDEX_DIR, exist_ok=True)
+                    idx.save(self._file(name, "lines"))
+                except OSError:
+                    _log.warning("Could not save line index for %s", name)
+            return idx
+
+    def time_index(self, name: str, path: str, parser: TimestampParser) -> TimeIndex:
+        """Return the timestamp index of ``name``, sampled up to the current end."""
+        with self._lock:
+            lock = self._name_locks.setdefault(name, threading.Lock())
+        with lock:
+            idx = self._time_indexes.get(name)
+            pattern = parser.regex.pattern if parser.regex else None
+            if idx is None or idx.path != path or (idx.parser.regex.pattern if idx.parser.regex else None) != pattern \
+                    or idx.parser.fmt != parser.fmt:
+                idx = TimeIndex.load(self._file(name, "times"), path, parser, self.block_size) \
+                    or TimeIndex(path, parser, self.block_size)
+                self._time_indexes[name] = idx
+            # Keep the caller's parser: its syslog year follows the current mtime
+            idx.parser = parser
+            if idx.extend():
+                try:
+                    os.makedirs(INDEX_DIR, exist_ok=True)
+                    idx.save(self._file(name, "times"))
+                except OSError:
+                    _log.warning("Could not save time index for %s", name)
+            return idx
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {
+                name: {"blocks": len(i.blocks), "indexed_bytes": i.indexed_end, "trigrams": len(i.postings)}
+                for name, i in self._indexes.items()
+            }
+            for name, li in self._line_indexes.items():
+                out.setdefault(name, {})["lines"] = li.lines
+            return out
+
+
+_MANAGER: Optional[LogIndexManager] = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_log_index() -> LogIndexManager:
+    """Return the process-wide index manager (trigrams follow ``api.search_index``)."""
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            try:
+                cfg = load_config()
+                api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+                workers = int(api_cfg.get("search_workers", 0)) or (os.cpu_count() or 1)
+                _MANAGER = LogIndexManager(
+                    block_size=int(api_cfg.get("search_index_block", 1024 * 1024)),
+                    min_size=int(api_cfg.get("search_index_min_size", 8 * 1024 * 1024)),
+                    trigrams=bool(api_cfg.get("search_index", True)),
+                    line_step=int(api_cfg.get("line_index_step", 1000)),
+                    workers=workers,
+                    max_builds=int(api_cfg.get("search_index_builds", 2)),
+                )
+            except Exception:
+                _MANAGER = LogIndexManager()
+        return _MANAGER
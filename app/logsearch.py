@@ -0,0 +1,828 @@
+import os
+import re
+import copy
+import sys
+import bz2
+import glob
+import gzip
+import lzma
+import mmap
+import heapq
+import queue
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .logtime import TimeWindow, TimestampParser
+from .multiterm import TermMatcher
+
+
+# (start byte, end byte, 1-based number of the first line at ``start``)
+Range = Tuple[int, int, int]
+# ("match", dict) | ("progress", bytes scanned) | ("done", truncated)
+# | ("lines", (line start offset, newlines before it)): where a complete scan
+# ended, so a resumable cache needs no line index
+Event = Tuple[str, Any]
+
+_READ_CHUNK = 1024 * 1024
+PROGRESS_STEP = 8 * 1024 * 1024
+
+
+class SearchQuery:
+    """Parameters of one local log search (mirrors the /search query string)."""
+
+    def __init__(self, q: str = "", regex: bool = False, case: bool = False, context: int = 0, limit: int = 5000,
+                 window: Optional[TimeWindow] = None, terms: Optional[List[str]] = None):
+        self.q = q
+        self.regex = regex
+        self.case = case
+        self.context = max(0, context)
+        self.limit = max(1, limit)
+        # Only lines whose timestamp (inherited by continuation lines) is inside
+        self.window = window
+        self.pattern: Optional["re.Pattern[str]"] = None
+        # Watchlist mode: a line matches if it contains any term (``q`` is ignored)
+        self.terms: Optional[TermMatcher] = TermMatcher(terms, case) if terms else None
+        if self.terms is not None:
+            self.pattern = self.terms.pattern
+        elif q and regex:
+            try:
+                self.pattern = re.compile(q, 0 if case else re.IGNORECASE)
+            except re.error:
+                # Invalid regex falls back to a substring search
+                self.pattern = None
+
+    def matcher(self) -> Callable[[str], bool]:
+        if self.terms is not None:
+            return self.terms.search
+        if not self.q:
+            return lambda line: True
+        if self.pattern is not None:
+            search = self.pattern.search
+            return lambda line: search(line) is not None
+        if self.case:
+            q = self.q
+            return lambda line: q in line
+        ql = self.q.lower()
+        return lambda line: ql in line.lower()
+
+    def literal(self) -> Optional[str]:
+        """The substring every match must contain, if the query is a plain substring."""
+        if self.q and self.pattern is None:
+            return self.q
+        return None
+
+    def cache_key(self) -> Tuple[Any, ...]:
+        """Everything that determines the result for a given file content."""
+        terms = self.terms.key() if self.terms is not None else None
+        return (self.q, self.regex, self.case, self.context, self.limit, terms)
+
+    def prefilter(self) -> Optional[Tuple[bytes, bool]]:
+        """``(needle, fold)`` with the UTF-8 bytes every matching line contains.
+
+        ``fold`` means the needle is lowercase ASCII to be looked up in a
+        lowercased buffer. None for watchlists and for regexes without a
+        required literal.
+        """
+        if self.terms is not None or not self.q:
+            return None
+        if self.pattern is not None:
+            text = required_literal(self.pattern)
+            fold = bool(self.pattern.flags & re.IGNORECASE)
+        else:
+            text, fold = self.q, not self.case
+        if not text or "\n" in text or "\ufffd" in text:
+            return None
+        if fold:
+            if not text.isascii():
+                return None
+            text = text.lower()
+        return text.encode("utf-8"), fold
+
+    def with_limit(self, limit: int) -> "SearchQuery":
+        """Copy of this query with another ``limit``."""
+        clone = copy.copy(self)
+        clone.limit = max(1, limit)
+        return clone
+
+
+def _literal_runs(items, out: List[str], c) -> None:
+    """Append to ``out`` the runs of literal characters every match of ``items`` contains.
+
+    ``c`` is the ``re`` constants module the opcodes come from.
+    """
+    repeats = (c.MAX_REPEAT, c.MIN_REPEAT, c.POSSESSIVE_REPEAT)
+    run: List[str] = []
+    for op, av in items:
+        if op == c.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            out.append("".join(run))
+            run = []
+        # Groups that change flags (``(?i:...)``) are skipped: their case rules differ
+        if op == c.SUBPATTERN and not av[1] and not av[2]:
+            _literal_runs(av[3], out, c)
+        elif op == c.ATOMIC_GROUP:
+            _literal_runs(av, out, c)
+        elif op in repeats and av[0] >= 1:
+            _literal_runs(av[2], out, c)
+    if run:
+        out.append("".join(run))
+
+
+def required_literal(pattern: "re.Pattern[str]") -> Optional[str]:
+    """Longest literal string every match of ``pattern`` must contain, if any."""
+    try:
+        # Private to ``re``: if these move, searches simply run without a prefilter
+        from re import _constants as sre_c, _parser as sre_parse
+
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+        runs: List[str] = []
+        _literal_runs(parsed, runs, sre_c)
+    except Exception:
+        return None
+    return max(runs, key=len) if runs else None
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def lines_before(f, offset: int, count: int) -> List[str]:
+    """Return up to ``count`` complete lines ending right before byte ``offset``."""
+    if count <= 0 or offset <= 0:
+        return []
+    end = offset
+    data = b""
+    while end > 0 and data.count(b"\n") <= count:
+        size = min(65536, end)
+        end -= size
+        f.seek(end)
+        data = f.read(size) + data
+    # data ends with the newline that terminates the line before ``offset``
+    lines = data.split(b"\n")[:-1]
+    if end > 0:
+        lines = lines[1:]  # first piece may be a partial line
+    return [_decode(ln) for ln in lines[-count:]]
+
+
+def iter_lines(f, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, raw line)`` for the lines in ``[start, end)`` without newlines."""
+    f.seek(start)
+    pos = start
+    pending = b""
+    pending_at = start
+    while pos < end:
+        chunk = f.read(min(_READ_CHUNK, end - pos))
+        if not chunk:
+            break
+        pos += len(chunk)
+        data = pending + chunk
+        base = pending_at
+        cut = 0
+        while True:
+            nl = data.find(b"\n", cut)
+            if nl < 0:
+                break
+            yield base + cut, data[cut:nl]
+            cut = nl + 1
+        pending = data[cut:]
+        pending_at = base + cut
+    if pending:
+        yield pending_at, pending
+
+
+def window_lines(path: str, window: TimeWindow, rng: Range) -> Iterator[Tuple[int, str]]:
+    """Yield ``(line number, text)`` for lines of ``rng`` inside ``window``."""
+    start, end, lineno = rng
+    ts: Optional[float] = None
+    with open(path, "rb") as f:
+        for _, raw in iter_lines(f, start, end):
+            line = _decode(raw)
+            parsed = window.parser.parse(line)
+            if parsed is not None:
+                ts = parsed
+            if window.contains(ts):
+                yield lineno, line
+            lineno += 1
+
+
+def read_lines(path: str, start: int, first_line: int, from_line: int, count: int) -> List[str]:
+    """Return ``count`` lines starting at ``from_line``, reading from ``start``.
+
+    ``start`` must be the offset of line ``first_line`` (a line-index
+    checkpoint at or before ``from_line``).
+    """
+    out: List[str] = []
+    if count <= 0:
+        return out
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        lineno = first_line
+        for _, raw in iter_lines(f, start, size):
+            if lineno >= from_line:
+                out.append(_decode(raw))
+                if len(out) >= count:
+                    break
+            lineno += 1
+    return out
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    """Sort and coalesce touching ranges (line numbers follow the first one)."""
+    out: List[Range] = []
+    for start, end, line in sorted(ranges):
+        if out and start <= out[-1][1]:
+            prev = out[-1]
+            out[-1] = (prev[0], max(prev[1], end), prev[2])
+        else:
+            out.append((start, end, line))
+    return out
+
+
+def _match_lines(lines: Iterator[Tuple[int, bytes]], query: SearchQuery, first_line: int,
+                 before: List[str]) -> Iterator[Event]:
+    """Match a run of ``(offset, raw line)`` pairs against ``query``.
+
+    Yields ``("match", dict)`` per hit and ``("progress", offset)`` roughly
+    every ``PROGRESS_STEP`` bytes. ``before`` seeds the context buffer with
+    the lines preceding the run. Stops by itself only when exhausted, then
+    yields ``("lines", (offset, lines before it))`` for the last line.
+    """
+    match = query.matcher()
+    context = query.context
+    window = query.window
+    terms = query.terms
+    buf: "deque[str]" = deque(before, maxlen=context or None)
+    lineno = first_line
+    reported: Optional[int] = None
+    ts: Optional[float] = None
+    last = None
+    for off, raw in lines:
+        last = off, lineno - 1
+        if reported is None:
+            reported = off
+        elif off - reported >= PROGRESS_STEP:
+            yield "progress", off
+            reported = off
+        line = _decode(raw)
+        if window is not None:
+            parsed = window.parser.parse(line)
+            if parsed is not None:
+                ts = parsed
+        if (window is None or window.contains(ts)) and match(line):
+            item = {
+                "line": lineno,
+                "text": line,
+                "context_before": list(buf) if context > 0 else [],
+            }
+            if terms is not None:
+                item["terms"] = terms.matched(line)
+            yield "match", item
+        if context > 0:
+            buf.append(line)
+        lineno += 1
+    if last is not None:
+        yield "lines", last
+
+
+# Non-ASCII characters that fold onto these letters (U+0130, U+0131, U+017F,
+# U+212A) are invisible to a lowercased byte buffer
+_FOLD_RISK = frozenset(b"iks")
+
+
+def _match_candidates(f, start: int, end: int, query: SearchQuery, first_line: int,
+                      needle: bytes, fold: bool) -> Iterator[Event]:
+    """``_match_lines`` over ``[start, end)`` that only decodes lines containing ``needle``.
+
+    Each read buffer is searched with ``bytes.find`` (lowercased once per
+    buffer when ``fold``); the lines in between are only counted.
+    Candidates are confirmed with the query's matcher and context is read
+    back from the file, so results equal a line-by-line scan.
+    """
+    match = query.matcher()
+    context = query.context
+    risky = fold and not _FOLD_RISK.isdisjoint(needle)
+    lineno = first_line
+    pos = start
+    pending = b""
+    pending_at = start
+    reported = start
+    done = False
+    while not done:
+        want = min(_READ_CHUNK, end - pos)
+        f.seek(pos)
+        chunk = f.read(want) if want > 0 else b""
+        pos += len(chunk)
+        done = len(chunk) < want or pos >= end
+        data = pending + chunk
+        if not data:
+            break
+        base = pending_at
+        if base - reported >= PROGRESS_STEP:
+            yield "progress", base
+            reported = base
+        hay = data.lower() if fold else data
+        # Such text may hide a folded match from ``find``; check every line instead
+        every = risky and not data.isascii()
+        counted = 0
+        cut = 0
+        while cut < len(data):
+            at = cut if every else hay.find(needle, cut)
+            if at < 0:
+                break
+            ls = data.rfind(b"\n", 0, at) + 1
+            nl = data.find(b"\n", at)
+            if nl < 0 and not done:
+                break  # unfinished last line; searched again with the next buffer
+            stop = len(data) if nl < 0 else nl
+            lineno += data.count(b"\n", counted, ls)
+            counted = ls
+            line = _decode(data[ls:stop])
+            if match(line):
+                yield "match", {
+                    "line": lineno,
+                    "text": line,
+                    "context_before": lines_before(f, base + ls, context) if context > 0 else [],
+                }
+            cut = stop + 1
+        tail = data.rfind(b"\n") + 1
+        lineno += data.count(b"\n", counted, tail)
+        pending = data[tail:]
+        pending_at = base + tail
+    yield "lines", (pending_at, lineno - 1)
+
+
+def iter_ranges(path: str, query: SearchQuery, ranges: List[Range]) -> Iterator[Event]:
+    """Scan the given byte ranges of ``path``, yielding search events.
+
+    Each range starts at a line boundary and carries the global number of
+    its first line, so results match a full scan exactly. Context lines
+    that fall before a range are read back from the file. Yields
+    ``("match", dict)`` per hit, ``("progress", bytes scanned)`` every
+    ``PROGRESS_STEP`` bytes and finally ``("done", truncated)``.
+    """
+    found = 0
+    scanned = 0
+    anchor: Optional[Tuple[int, int]] = None
+    # Time windows need every line's timestamp, so they always go line by line
+    pre = query.prefilter() if query.window is None else None
+    with open(path, "rb") as f:
+        for start, end, first_line in merge_ranges(ranges):
+            if pre is not None:
+                events = _match_candidates(f, start, end, query, first_line, *pre)
+            else:
+                before = lines_before(f, start, query.context)
+                events = _match_lines(iter_lines(f, start, end), query, first_line, before)
+            anchor = (start, first_line - 1)
+            for kind, value in events:
+                if kind == "progress":
+                    yield "progress", scanned + value - start
+                    continue
+                if kind == "lines":
+                    anchor = value
+                    continue
+                yield kind, value
+                found += 1
+                if found >= query.limit:
+                    yield "done", True
+                    return
+            scanned += end - start
+            yield "progress", scanned
+    if anchor is not None:
+        yield "lines", anchor
+    yield "done", False
+
+
+def collect(events: Iterator[Event]) -> Tuple[List[Dict[str, Any]], bool]:
+    """Drain search events into ``(matches, truncated)``."""
+    results: List[Dict[str, Any]] = []
+    truncated = False
+    for kind, value in events:
+        if kind == "match":
+            results.append(value)
+        elif kind == "done":
+            truncated = value
+    return results, truncated
+
+
+def search_ranges(path: str, query: SearchQuery, ranges: List[Range]) -> Tuple[List[Dict[str, Any]], bool]:
+    """Scan byte ranges of ``path`` and return ``(matches, truncated)``."""
+    return collect(iter_ranges(path, query, ranges))
+
+
+def search_file(path: str, query: SearchQuery) -> Tuple[List[Dict[str, Any]], bool]:
+    """Linear scan of the whole file."""
+    if not os.path.exists(path):
+        return [], False
+    return search_ranges(path, query, [(0, os.path.getsize(path), 1)])
+
+
+# ------------- parallel scan -------------
+
+# Patterns whose meaning depends on the start or end of the subject string
+# (``\A`` would only match at the chunk start, ``\Z`` at its end); scanning a
+# whole chunk at once would mis-report per-line matches, so those chunks are
+# searched line by line.
+_LINE_ONLY = re.compile(r"\\[AZz]|\(\?<?[=!]")
+
+
+def _hit_lines(text: str, query: SearchQuery) -> Iterator[int]:
+    """Yield start offsets (in ``text``) of lines that may match ``query``.
+
+    Runs one C-level search over the whole chunk instead of one call per
+    line; callers confirm each candidate with the per-line matcher.
+    """
+    find: Optional[Callable[[int], int]] = None
+    if query.pattern is not None:
+        if not _LINE_ONLY.search(query.q):
+            pattern = re.compile(query.pattern.pattern, query.pattern.flags | re.MULTILINE)
+
+            def find(pos: int) -> int:
+                m = pattern.search(text, pos)
+                return m.start() if m else -1
+    elif query.q:
+        hay, needle = (text, query.q) if query.case else (text.lower(), query.q.lower())
+        # Lowercasing can change offsets for a few characters; scan every line then
+        if len(hay) == len(text):
+            def find(pos: int) -> int:
+                return hay.find(needle, pos)
+
+    pos = 0
+    while pos < len(text):
+        at = pos if find is None else find(pos)
+        if at < 0 or at >= len(text):
+            return
+        ls = text.rfind("\n", 0, at) + 1
+        yield ls
+        nl = text.find("\n", at)
+        if nl < 0:
+            return
+        pos = nl + 1
+
+
+def scan_chunk(path: str, start: int, end: int, query: SearchQuery) -> Tuple[int, List[Tuple[int, str, List[str]]]]:
+    """Search one newline-aligned chunk; runs in a worker process.
+
+    Returns the number of lines in the chunk and up to ``query.limit``
+    matches as ``(line index within chunk, text, context_before)``.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            raw = mm[start:end]
+        head = lines_before(f, start, query.context) if query.context else []
+    text = raw.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+    nlines = text.count("\n") + (0 if text.endswith("\n") or not text else 1)
+    match = query.matcher()
+    context = query.context
+    out: List[Tuple[int, str, List[str]]] = []
+    counted_to = 0
+    idx = 0
+    for ls in _hit_lines(text, query):
+        idx += text.count("\n", counted_to, ls)
+        counted_to = ls
+        le = text.find("\n", ls)
+        le = len(text) if le < 0 else le
+        line = text[ls:le].rstrip("\r")
+        if not match(line):
+            continue
+        ctx: List[str] = []
+        if context:
+            p = ls
+            while len(ctx) < context and p > 0:
+                prev = text.rfind("\n", 0, p - 1) + 1
+                ctx.insert(0, text[prev:p - 1].rstrip("\r"))
+                p = prev
+            if len(ctx) < context and head:
+                ctx = head[-(context - len(ctx)):] + ctx
+        out.append((idx, line, ctx))
+        if len(out) >= query.limit:
+            break
+    return nlines, out
+
+
+def split_chunks(path: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """Cut ``path`` into newline-aligned ``(start, end)`` chunks of about ``chunk_size``."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    out: List[Tuple[int, int]] = []
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                cut = start + chunk_size
+                if cut >= size:
+                    out.append((start, size))
+                    break
+                nl = mm.find(b"\n", cut)
+                end = size if nl < 0 else nl + 1
+                out.append((start, end))
+                start = end
+    return out
+
+
+def iter_parallel(path: str, query: SearchQuery, executor: Executor, chunk_size: int = 16 * 1024 * 1024) -> Iterator[Event]:
+    """Search ``path`` in newline-aligned chunks on ``executor``, yielding events.
+
+    Chunks are collected in file order, so line numbers, context and the
+    first-``limit`` cut are the same as a linear scan. Chunks beyond the
+    limit, or left over when the consumer stops early, are cancelled.
+    """
+    if not os.path.exists(path):
+        yield "done", False
+        return
+    chunks = split_chunks(path, chunk_size)
+    futures = [executor.submit(scan_chunk, path, s, e, query) for s, e in chunks]
+    found = 0
+    line_base = 1
+    # Every chunk but the last ends with a newline, so its start is a line start
+    anchor = (0, 0)
+    try:
+        for (start, end), fut in zip(chunks, futures):
+            anchor = (start, line_base - 1)
+            nlines, hits = fut.result()
+            for idx, text, ctx in hits:
+                item = {"line": line_base + idx, "text": text, "context_before": ctx}
+                if query.terms is not None:
+                    item["terms"] = query.terms.matched(text)
+                yield "match", item
+                found += 1
+                if found >= query.limit:
+                    yield "done", True
+                    return
+            line_base += nlines
+            yield "progress", end
+    finally:
+        for fut in futures:
+            fut.cancel()
+    yield "lines", anchor
+    yield "done", False
+
+
+def search_parallel(path: str, query: SearchQuery, executor: Executor, chunk_size: int = 16 * 1024 * 1024) -> Tuple[List[Dict[str, Any]], bool]:
+    """Parallel equivalent of ``search_file``; returns ``(matches, truncated)``."""
+    return collect(iter_parallel(path, query, executor, chunk_size))
+
+
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_search_executor(workers: int) -> Optional[ProcessPoolExecutor]:
+    """Return the shared worker-process pool, or None when ``workers`` <= 1."""
+    global _EXECUTOR
+    if workers <= 1:
+        return None
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ProcessPoolExecutor(max_workers=workers)
+        return _EXECUTOR
+
+
+# ------------- cross-log merge -------------
+
+_FEED_DONE = object()
+
+
+def _put(out: "queue.Queue[Any]", item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _feed(events: Iterator[Event], out: "queue.Queue[Any]", stop: threading.Event) -> None:
+    """Drain one log's matches into ``out`` until exhausted or ``stop`` is set."""
+    try:
+        for kind, value in events:
+            if kind == "match" and not _put(out, value, stop):
+                return
+    except Exception as e:  # surfaced to the merging side
+        _put(out, e, stop)
+    finally:
+        close = getattr(events, "close", None)
+        if close:
+            close()
+        _put(out, _FEED_DONE, stop)
+
+
+def iter_merged(sources: List[Tuple[str, Iterator[Event], TimestampParser]], limit: int,
+                queue_size: int = 1000) -> Iterator[Event]:
+    """K-way merge of several logs' search events by line timestamp.
+
+    Every source is scanned on its own worker thread into a bounded queue,
+    and ``heapq.merge`` pulls the earliest head. Matches get ``log`` and
+    ``ts`` keys; a match without a parseable timestamp takes the previous
+    one from the same log (or sorts first), so each log keeps its own
+    order. Stops after ``limit`` matches and cancels the remaining scans.
+    """
+    stop = threading.Event()
+    queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize=queue_size) for _ in sources]
+    pool = ThreadPoolExecutor(max_workers=max(1, len(sources)), thread_name_prefix="log-merge")
+
+    def keyed(i: int, name: str, parser: TimestampParser) -> Iterator[Tuple[float, int, int, Dict[str, Any]]]:
+        last = float("-inf")
+        seq = 0
+        while True:
+            item = queues[i].get()
+            if item is _FEED_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            ts = parser.parse(item["text"])
+            if ts is not None:
+                last = ts
+            item["log"] = name
+            item["ts"] = ts
+            seq += 1
+            yield last, i, seq, item
+
+    try:
+        for (_, events, _), q in zip(sources, queues):
+            pool.submit(_feed, events, q, stop)
+        count = 0
+        for _, _, _, item in heapq.merge(*(keyed(i, name, parser) for i, (name, _, parser) in enumerate(sources))):
+            yield "match", item
+            count += 1
+            if count >= limit:
+                yield "done", True
+                return
+        yield "done", False
+    finally:
+        stop.set()
+        # Unblock feeders waiting on a full queue so their threads exit
+        for q in queues:
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+        pool.shutdown(wait=False)
+
+
+# ------------- rotated members -------------
+
+_OPENERS: Dict[str, Callable[..., Any]] = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+
+
+def open_member(path: str):
+    """Open a log file for binary reading, decompressing ``.gz``/``.xz``/``.bz2``."""
+    opener = _OPENERS.get(os.path.splitext(path)[1].lower())
+    return opener(path, "rb") if opener else open(path, "rb")
+
+
+def rotated_members(pattern: str, live: str) -> List[str]:
+    """Files matched by a log's rotation glob, oldest first, excluding ``live``.
+
+    Ordered by mtime: a rotated file keeps the time of its last write
+    whether the scheme numbers (``.1``, ``.2.gz``) or dates its members.
+    """
+    live_abs = os.path.abspath(live)
+    found = []
+    for p in glob.glob(pattern):
+        if os.path.abspath(p) == live_abs or not os.path.isfile(p):
+            continue
+        try:
+            found.append((os.path.getmtime(p), p))
+        except OSError:
+            continue
+    return [p for _, p in sorted(found)]
+
+
+def scan_member(path: str, query: SearchQuery) -> Tuple[List[Dict[str, Any]], bool]:
+    """Search one whole rotated member (streaming any decompression).
+
+    Runs in a worker process when a pool is available. Line numbers are
+    within the member; every match carries its ``file``.
+    """
+    results: List[Dict[str, Any]] = []
+    with open_member(path) as f:
+        for kind, value in _match_lines(iter_lines(f, 0, sys.maxsize), query, 1, []):
+            if kind != "match":
+                continue
+            value["file"] = path
+            results.append(value)
+            if len(results) >= query.limit:
+                return results, True
+    return results, False
+
+
+def tail_member(path: str, count: int, window: Optional[TimeWindow] = None) -> List[str]:
+    """Last ``count`` lines of a rotated member (inside ``window`` if given)."""
+    out: "deque[str]" = deque(maxlen=max(0, count))
+    ts: Optional[float] = None
+    with open_member(path) as f:
+        for _, raw in iter_lines(f, 0, sys.maxsize):
+            line = _decode(raw)
+            if window is not None:
+                parsed = window.parser.parse(line)
+                if parsed is not None:
+                    ts = parsed
+                if not window.contains(ts):
+                    continue
+            out.append(line)
+    return list(out)
+
+
+class MemberCache:
+    """LRU of per-member search results.
+
+    Rotated members do not change, so a result stays valid while the file's
+    identity (inode, size, mtime) is the same; that identity is part of the
+    key so a reused name is never served stale results.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Tuple[Any, ...], Tuple[List[Dict[str, Any]], bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(path: str, query: SearchQuery) -> Optional[Tuple[Any, ...]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        window = query.window
+        win = None
+        if window is not None:
+            parser = window.parser
+            win = (window.start, window.end, parser.regex.pattern if parser.regex else None, parser.fmt)
+        return (path, st.st_ino, st.st_size, st.st_mtime_ns, query.cache_key(), win)
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return hit
+
+    def put(self, key: Tuple[Any, ...], value: Tuple[List[Dict[str, Any]], bool]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+_MEMBER_CACHE = MemberCache()
+
+
+def iter_rotated(members: List[str], query: SearchQuery, executor: Optional[Executor] = None,
+                 cache: MemberCache = _MEMBER_CACHE) -> Iterator[Event]:
+    """Search rotated members oldest first as one stream, in parallel when possible.
+
+    Members last written before the window's start are skipped. Uncached
+    members are all submitted to ``executor`` at once and consumed in
+    order; progress is reported in on-disk (compressed) bytes.
+    """
+    window = query.window
+    if window is not None and window.start is not None:
+        members = [m for m in members if os.path.getmtime(m) >= window.start]
+    keys = [cache.key(m, query) for m in members]
+    ready: Dict[int, Tuple[List[Dict[str, Any]], bool]] = {}
+    pending: Dict[int, Any] = {}
+    try:
+        for i, (member, key) in enumerate(zip(members, keys)):
+            hit = cache.get(key) if key is not None else None
+            if hit is not None:
+                ready[i] = hit
+            elif executor is not None:
+                pending[i] = executor.submit(scan_member, member, query)
+        found = 0
+        scanned = 0
+        for i, (member, key) in enumerate(zip(members, keys)):
+            result = ready.get(i)
+            if result is None:
+                result = pending[i].result() if i in pending else scan_member(member, query)
+                if key is not None:
+                    cache.put(key, result)
+            for item in result[0]:
+                yield "match", dict(item)
+                found += 1
+                if found >= query.limit:
+                    yield "done", True
+                    return
+            scanned += os.path.getsize(member)
+            yield "progress", scanned
+    finally:
+        for fut in pending.values():
+            fut.cancel()
+    yield "done", False
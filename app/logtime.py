@@ -0,0 +1,128 @@
+import re
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional
+
+
+_MONTHS = {m: i for i, m in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), start=1)}
+
+# 2024-05-01T02:10:33.123+07:00, 2024-05-01 02:10:33,123 (journald/OpenSSH for Windows/app logs)
+_ISO_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,](\d{1,9}))?\s?(Z|[+-]\d{2}:?\d{2})?"
+)
+# May  1 02:10:33 (classic syslog / auth.log; no year)
+_SYSLOG_RE = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) +(\d{1,2}) (\d{2}):(\d{2}):(\d{2})\b")
+
+# Timestamps are looked for near the start of a line only, so dates quoted in
+# a message body do not move a line in time
+_HEAD = 64
+
+
+def _epoch(dt: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are taken as local time."""
+    if dt.tzinfo is None:
+        return time.mktime(dt.timetuple()) + dt.microsecond / 1e6
+    return dt.timestamp()
+
+
+def _tz(raw: Optional[str]) -> Optional[timezone]:
+    if not raw:
+        return None
+    if raw == "Z":
+        return timezone.utc
+    sign = -1 if raw[0] == "-" else 1
+    digits = raw[1:].replace(":", "")
+    return timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:4])))
+
+
+class TimestampParser:
+    """Extract a line's timestamp as epoch seconds.
+
+    Uses the log entry's ``time_regex`` (first group, or the ``ts`` group)
+    parsed with ``time_format`` when configured; otherwise recognises ISO
+    8601 and syslog (``May  1 02:10:33``) timestamps. Syslog has no year, so
+    ``year_hint`` (the file's mtime) anchors it, rolling back a year for
+    dates that would lie in the future.
+    """
+
+    def __init__(self, regex: Optional[str] = None, fmt: Optional[str] = None, year_hint: Optional[float] = None):
+        self.regex = re.compile(regex) if regex else None
+        self.fmt = fmt or None
+        self.year_hint = year_hint if year_hint is not None else time.time()
+        hint = datetime.fromtimestamp(self.year_hint)
+        self._year = hint.year
+        self._limit = hint + timedelta(days=1)
+
+    def parse(self, line: str) -> Optional[float]:
+        try:
+            if self.regex is not None:
+                m = self.regex.search(line)
+                if not m:
+                    return None
+                raw = m.group("ts") if "ts" in self.regex.groupindex else (m.group(1) if m.groups() else m.group(0))
+                if self.fmt:
+                    return _epoch(datetime.strptime(raw, self.fmt))
+                return self._builtin(raw)
+            return self._builtin(line[:_HEAD])
+        except (ValueError, OverflowError):
+            return None
+
+    def _builtin(self, text: str) -> Optional[float]:
+        m = _ISO_RE.search(text)
+        if m:
+            frac = (m.group(7) or "0")[:6].ljust(6, "0")
+            dt = datetime(
+                int(m.group(1)), int(m.group(2)), int(m.group(3)),
+                int(m.group(4)), int(m.group(5)), int(m.group(6)), int(frac),
+                tzinfo=_tz(m.group(8)),
+            )
+            return _epoch(dt)
+        m = _SYSLOG_RE.search(text)
+        if m:
+            dt = datetime(self._year, _MONTHS[m.group(1)], int(m.group(2)),
+                          int(m.group(3)), int(m.group(4)), int(m.group(5)))
+            if dt > self._limit:
+                dt = dt.replace(year=self._year - 1)
+            return _epoch(dt)
+        return None
+
+
+def parser_for(log: Dict[str, Any], year_hint: Optional[float] = None) -> TimestampParser:
+    """Build the parser for a normalized ``logs`` entry."""
+    return TimestampParser(log.get("time_regex"), log.get("time_format"), year_hint)
+
+
+def parse_bound(value: Optional[str]) -> Optional[float]:
+    """Parse a ``start``/``end`` query value: epoch seconds or ISO 8601 (naive = local)."""
+    if value is None or not str(value).strip():
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        return _epoch(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"invalid time: {value!r}")
+
+
+class TimeWindow:
+    """Inclusive ``[start, end]`` filter; either bound may be open."""
+
+    def __init__(self, parser: TimestampParser, start: Optional[float] = None, end: Optional[float] = None):
+        self.parser = parser
+        self.start = start
+        self.end = end
+
+    def contains(self, ts: Optional[float]) -> bool:
+        if ts is None:
+            return False
+        if self.start is not None and ts < self.start:
+            return False
+        if self.end is not None and ts > self.end:
+            return False
+        return True
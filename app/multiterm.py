@@ -0,0 +1,133 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+MAX_TERMS = 10000
+MAX_TERM_LEN = 256
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over a fixed set of terms.
+
+    ``find_all`` walks the text once and reports every term occurring in
+    it, including overlapping ones (``10.0.0.1`` inside ``10.0.0.12``).
+    """
+
+    def __init__(self, terms: List[str]):
+        self.terms = terms
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for i, term in enumerate(terms):
+            node = 0
+            for ch in term:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(i)
+        # Breadth-first: a node's failure link points to the longest proper
+        # suffix that is also a trie path; outputs are inherited along it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[str]:
+        """Distinct terms found in ``text``, in order of first occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        seen: Dict[int, None] = {}
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                for i in out[node]:
+                    seen.setdefault(i, None)
+        return [self.terms[i] for i in seen]
+
+
+def _trie_regex(node: Dict[str, dict]) -> str:
+    """Regex source for a character trie; shares prefixes so ``re`` never backtracks over alternatives."""
+    ends = "" in node
+    alts: List[str] = []
+    singles: List[str] = []
+    for ch in sorted(k for k in node if k):
+        sub = _trie_regex(node[ch])
+        if sub:
+            alts.append(re.escape(ch) + sub)
+        else:
+            singles.append(re.escape(ch))
+    if singles:
+        alts.append(singles[0] if len(singles) == 1 else "[" + "".join(singles) + "]")
+    if not alts:
+        return ""
+    body = alts[0] if len(alts) == 1 and not ends else "(?:" + "|".join(alts) + ")"
+    return body + "?" if ends else body
+
+
+class TermMatcher:
+    """Match lines against a watchlist of literal terms.
+
+    A trie-shaped regex finds candidate lines at C speed; the Aho-Corasick
+    automaton then confirms them and reports which terms occur.
+    Case-insensitive matching lowercases terms and lines, like the
+    single-term substring search.
+    """
+
+    def __init__(self, terms: Iterable[str], case: bool = False):
+        self.case = case
+        cleaned: Dict[str, None] = {}
+        for t in terms:
+            t = (t or "").strip()
+            if t:
+                cleaned.setdefault(t if case else t.lower(), None)
+        self.terms = list(cleaned)
+        if len(self.terms) > MAX_TERMS:
+            raise ValueError(f"too many terms (max {MAX_TERMS})")
+        if any(len(t) > MAX_TERM_LEN for t in self.terms):
+            raise ValueError(f"term longer than {MAX_TERM_LEN} characters")
+        trie: Dict[str, dict] = {}
+        for t in self.terms:
+            node = trie
+            for ch in t:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        source = _trie_regex(trie) if self.terms else "(?!)"
+        self.pattern = re.compile(source, 0 if case else re.IGNORECASE)
+        self.automaton = AhoCorasick(self.terms)
+
+    def matched(self, line: str) -> List[str]:
+        """Terms occurring in ``line`` (empty if none)."""
+        if self.pattern.search(line) is None:
+            return []
+        return self.automaton.find_all(line if self.case else line.lower())
+
+    def search(self, line: str) -> bool:
+        return bool(self.matched(line))
+
+    def key(self) -> tuple:
+        return (self.case, tuple(self.terms))
+
+
+def parse_terms(values: Iterable[str], upload: Optional[bytes] = None) -> List[str]:
+    """Collect terms from repeated ``terms`` values and an uploaded list (one per line)."""
+    out: List[str] = []
+    for v in values:
+        out.extend((v or "").splitlines())
+    if upload:
+        out.extend(upload.decode("utf-8", errors="replace").splitlines())
+    return [t.strip() for t in out if t.strip()]
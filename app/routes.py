@@ -1,17 +1,43 @@
 import os
-import re
+import stat
+import fnmatch
 import time
+import uuid
+import base64
+import hashlib
+import lzma
+import codecs
 import logging
 import sqlite3
 import json
-from typing import List, Dict, Any, Optional
-from flask import Blueprint, jsonify, request, send_file, abort, Response, url_for
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from flask import Blueprint, jsonify, request, send_file, abort, Response, url_for, stream_with_context
 from .config import load_config, get_log_by_name
 from .db import get_db, row_to_dict, get_images_dir
+from .ssh_pool import get_pool
+from .follow import get_follow_hub
+from .list_cache import get_list_cache
+from .health import get_health_monitor
+from .image_cache import get_image_cache, get_image_disk_cache, get_thumbnail_store, make_thumbnail, thumb_size
+from .singleflight import SingleFlight
+from .logsearch import (
+    SearchQuery, collect, iter_ranges, iter_parallel, iter_merged, iter_rotated,
+    read_lines, window_lines, rotated_members, tail_member, get_search_executor,
+)
+from .log_index import get_log_index
+from .search_cache import get_search_cache
+from .multiterm import TermMatcher, parse_terms
+from .logtime import TimeWindow, parse_bound, parser_for
 
 
 bp = Blueprint("api", __name__, url_prefix="/api")
 _log = logging.getLogger(__name__)
+# Concurrent identical remote fetches (images, /cat) share one transfer
+_inflight = SingleFlight()
 
 
 def _file_info(path: str) -> Dict[str, Any]:
@@ -60,6 +86,9 @@ IMG_EXTS = [
     "jpg", "jpeg", "png", "gif", "bmp", "webp", "svg", "ico", "tif", "tiff"
 ]
 TXT_EXTS = ["log", "txt", "md"]
+_GLOB_CHARS = set("*?[")
+# Anything the shell would expand, split or interpret in an unquoted pattern
+_SHELL_CHARS = set("{}$`'\"\\;&|<>()!")
 
 
 def _infer_path_type(pattern: str) -> str:
@@ -98,24 +127,29 @@ def _split_path_chain_suffix(raw: str) -> tuple[str, List[str], str]:
     return base, chain, suffix
 
 
+def _tail_block_scan(f, lines: int, block: int = 1024) -> bytes:
+    """Read backward from the end of seekable ``f`` until ``lines`` newlines are seen."""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    data = b""
+    line_count = 0
+    while end > 0 and line_count <= lines:
+        size = min(block, end)
+        end -= size
+        f.seek(end)
+        chunk = f.read(size)
+        data = chunk + data
+        line_count = data.count(b"\n")
+    return data
+
+
 def _tail_lines(path: str, lines: int = 200, encoding: str = "utf-8") -> List[str]:
     # Efficient tail implementation
     if lines <= 0:
         return []
     try:
         with open(path, "rb") as f:
-            f.seek(0, os.SEEK_END)
-            end = f.tell()
-            block = 1024
-            data = b""
-            line_count = 0
-            while end > 0 and line_count <= lines:
-                size = min(block, end)
-                end -= size
-                f.seek(end)
-                chunk = f.read(size)
-                data = chunk + data
-                line_count = data.count(b"\n")
+            data = _tail_block_scan(f, lines)
             text = data.decode(encoding, errors="replace")
             result = text.splitlines()[-lines:]
             return result
@@ -123,6 +157,22 @@ def _tail_lines(path: str, lines: int = 200, encoding: str = "utf-8") -> List[st
         return []
 
 
+def _time_window(name: str, log: Dict[str, Any]) -> Optional[Tuple[TimeWindow, Any]]:
+    """``(TimeWindow, byte range)`` for the request's ``start``/``end``, or None.
+
+    The range comes from the log's timestamp index, so only the slice that
+    can hold the window is read. Raises ValueError for unparseable bounds.
+    """
+    start = parse_bound(request.args.get("start"))
+    end = parse_bound(request.args.get("end"))
+    if start is None and end is None:
+        return None
+    path = log["path"]
+    parser = parser_for(log, year_hint=os.path.getmtime(path))
+    idx = get_log_index().time_index(name, path, parser)
+    return TimeWindow(parser, start, end), idx.range_for(start, end)
+
+
 @bp.get("/logs/<name>/tail")
 def tail_log(name: str):
     cfg = load_config()
@@ -131,11 +181,97 @@ def tail_log(name: str):
         _log.warning("Tail request for unknown log: %s", name)
         abort(404)
     lines = int(request.args.get("lines", 200))
-    result = _tail_lines(log["path"], lines=lines)
+    try:
+        timed = _time_window(name, log) if os.path.exists(log["path"]) else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if timed:
+        # Last N lines inside the window rather than of the whole file
+        window, rng = timed
+        result = [text for _, text in deque(window_lines(log["path"], window, rng), maxlen=max(0, lines))]
+    else:
+        result = _tail_lines(log["path"], lines=lines)
+    # Continue into rotated members (newest first) when the live file is short
+    members = _members(log)
+    window = timed[0] if timed else None
+    if window is None and members and ("start" in request.args or "end" in request.args):
+        # Live file missing: still honour the window for the members
+        try:
+            window = TimeWindow(parser_for(log), parse_bound(request.args.get("start")), parse_bound(request.args.get("end")))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    for member in reversed(members):
+        if len(result) >= lines:
+            break
+        if window is not None and window.start is not None and os.path.getmtime(member) < window.start:
+            break
+        try:
+            result = tail_member(member, lines - len(result), window) + result
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            _log.warning("Tail %s: cannot read rotated member %s: %s", name, member, e)
     _log.info("Tail %s: %d lines", name, len(result))
     return jsonify({"name": name, "lines": result})
 
 
+@bp.get("/logs/<name>/lines")
+def log_lines(name: str):
+    """Random access by line number through the sparse line index.
+
+    ``from`` is 1-based; negative values count back from the end (``-1``
+    is the last line). Returns ``total`` so clients can page either way.
+    """
+    cfg = load_config()
+    log = get_log_by_name(cfg, name)
+    if not log:
+        _log.warning("Lines request for unknown log: %s", name)
+        abort(404)
+    try:
+        start = int(request.args.get("from", 1))
+        count = int(request.args.get("count", 200))
+    except ValueError:
+        return jsonify({"error": "from and count must be integers"}), 400
+    count = max(1, min(count, 5000))
+    path = log["path"]
+    if not os.path.exists(path):
+        return jsonify({"name": name, "from": 1, "lines": [], "total": 0, "eof": True})
+    try:
+        timed = _time_window(name, log)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    idx = get_log_index().line_index(name, path)
+    total = idx.total_lines()
+    if start < 0:
+        start = max(1, total + start + 1)
+    start = max(1, start)
+    if timed:
+        # Page through the window; ``from`` defaults to its first line
+        window, rng = timed
+        lines = []
+        first = None
+        exhausted = True
+        for lineno, text in window_lines(path, window, rng):
+            if "from" in request.args and lineno < start:
+                continue
+            if len(lines) >= count:
+                exhausted = False
+                break
+            first = lineno if first is None else first
+            lines.append(text)
+        start = first if first is not None else start
+        _log.info("Lines %s: window from=%d returned=%d", name, start, len(lines))
+        return jsonify({"name": name, "from": start, "lines": lines, "total": total, "eof": exhausted})
+    offset, first_line = idx.locate(start)
+    lines = read_lines(path, offset, first_line, start, count)
+    _log.info("Lines %s: from=%d count=%d returned=%d total=%d", name, start, count, len(lines), total)
+    return jsonify({
+        "name": name,
+        "from": start,
+        "lines": lines,
+        "total": total,
+        "eof": start + len(lines) > total,
+    })
+
+
 @bp.get("/logs/<name>/download")
 def download_log(name: str):
     cfg = load_config()
@@ -151,84 +287,295 @@ def download_log(name: str):
     return send_file(path, as_attachment=True)
 
 
-@bp.get("/logs/<name>/search")
+# Streaming search: max matches per frame, and max delay before a partial batch is sent
+_SEARCH_BATCH = 200
+_SEARCH_FLUSH_SECS = 0.25
+
+
+def _search_settings() -> Dict[str, int]:
+    """Parallel search knobs from ``api`` config (workers 0 = one per core)."""
+    out = {"workers": os.cpu_count() or 1, "min_size": 64 * 1024 * 1024, "chunk": 16 * 1024 * 1024}
+    try:
+        cfg = load_config()
+        api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+        workers = int(api_cfg.get("search_workers", 0))
+        if workers > 0:
+            out["workers"] = workers
+        out["min_size"] = max(0, int(api_cfg.get("search_parallel_min_size", out["min_size"])))
+        out["chunk"] = max(1024 * 1024, int(api_cfg.get("search_chunk_size", out["chunk"])))
+    except Exception:
+        pass
+    return out
+
+
+def _search_query() -> SearchQuery:
+    """Build the query from the request; raises ValueError for a bad watchlist.
+
+    Terms come from repeated ``terms`` values (newline-separated lists are
+    split), a JSON body ``{"terms": [...]}`` or an uploaded ``terms_file``
+    with one term per line.
+    """
+    values = request.values
+    body = request.get_json(silent=True) if request.is_json else None
+    raw_terms = values.getlist("terms")
+    if isinstance(body, dict) and isinstance(body.get("terms"), list):
+        raw_terms += [str(t) for t in body["terms"]]
+    upload = request.files.get("terms_file")
+    terms = parse_terms(raw_terms, upload.read() if upload else None)
+    return SearchQuery(
+        values.get("q", ""),
+        regex=values.get("regex", "0") == "1",
+        case=values.get("case", "0") == "1",
+        context=int(values.get("context", 0)),
+        limit=int(values.get("limit", 5000)),
+        terms=terms or None,
+    )
+
+
+def _search_events(name: str, path: str, query: SearchQuery, timed: Optional[Tuple[TimeWindow, Any]],
+                   parallel_arg: Optional[str] = None) -> Tuple[Iterator[Any], int, str]:
+    """Pick the cheapest scan for one log: ``(events, bytes to scan, mode)``.
+
+    A time window narrows to its slice; otherwise the trigram index plans
+    candidate blocks, and unindexed scans of large files go to the process
+    pool (``parallel=1|0`` overrides). Untimed searches go through the
+    result cache, which turns a repeated query into a scan of the appended
+    tail only.
+    """
+    mode = "linear"
+    try:
+        index = get_log_index()
+        settings = _search_settings()
+        size = os.path.getsize(path)
+        if timed:
+            # The time index already narrows the scan to one slice
+            query.window, rng = timed
+            ranges = [rng]
+        else:
+            ranges = index.plan(name, path, query.literal(), query.case)
+        if timed:
+            parallel = False
+        elif parallel_arg is not None:
+            parallel = parallel_arg == "1"
+        else:
+            parallel = ranges is None and size >= settings["min_size"]
+        executor = get_search_executor(settings["workers"]) if parallel else None
+        if executor is not None:
+            events, total, mode = iter_parallel(path, query, executor, settings["chunk"]), size, "parallel"
+        elif ranges is not None:
+            total = sum(end - start for start, end, _ in ranges)
+            events, mode = iter_ranges(path, query, ranges), "timed" if timed else "indexed"
+        else:
+            events, total = iter_ranges(path, query, [(0, size, 1)]), size
+        cache = get_search_cache()
+        if cache is not None and not timed:
+            events = cache.events(path, query, events, size)
+        return events, total, mode
+    except Exception:
+        _log.exception("Search %s failed (mode=%s)", name, mode)
+        return iter([("done", False)]), 0, mode
+
+
+def _members(log: Dict[str, Any]) -> List[str]:
+    """Rotated members of ``log``, oldest first (``rotated=0`` disables)."""
+    pattern = log.get("rotated")
+    if not pattern or request.args.get("rotated") == "0":
+        return []
+    return rotated_members(pattern, log["path"])
+
+
+def _log_events(name: str, path: str, members: List[str], query: SearchQuery,
+                timed: Optional[Tuple[TimeWindow, Any]], parallel_arg: Optional[str] = None) -> Tuple[Iterator[Any], int, str]:
+    """``_search_events`` over a log's rotated members followed by the live file.
+
+    Members are searched in parallel (cached, since they never change) and
+    emitted oldest first; the live file then gets what remains of ``limit``.
+    """
+    if not members:
+        return _search_events(name, path, query, timed, parallel_arg)
+    if timed:
+        query.window = timed[0]
+    sizes = 0
+    for m in members:
+        try:
+            sizes += os.path.getsize(m)
+        except OSError:
+            pass
+    live_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def chain() -> Iterator[Any]:
+        found = 0
+        base = 0
+        for kind, value in iter_rotated(members, query, get_search_executor(_search_settings()["workers"])):
+            if kind == "done":
+                if value:
+                    yield kind, value
+                    return
+                break
+            if kind == "match":
+                found += 1
+            else:
+                base = value
+            yield kind, value
+        if not os.path.exists(path):
+            yield "done", False
+            return
+        query.limit -= found
+        events, _, _ = _search_events(name, path, query, timed, parallel_arg)
+        try:
+            for kind, value in events:
+                yield kind, (base + value if kind == "progress" else value)
+        finally:
+            events.close()
+
+    return chain(), sizes + live_size, "rotated"
+
+
+@bp.route("/logs/<name>/search", methods=["GET", "POST"])
 def search_log(name: str):
     cfg = load_config()
     log = get_log_by_name(cfg, name)
     if not log:
         _log.warning("Search request for unknown log: %s", name)
         abort(404)
-    q = request.args.get("q", "")
-    use_regex = request.args.get("regex", "0") == "1"
-    case_sensitive = request.args.get("case", "0") == "1"
-    context = int(request.args.get("context", 0))
-    limit = int(request.args.get("limit", 5000))
+    try:
+        query = _search_query()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     path = log["path"]
-    flags = 0 if case_sensitive else re.IGNORECASE
+    members = _members(log)
 
-    matcher = None
-    if q:
-        if use_regex:
-            try:
-                matcher = re.compile(q, flags)
-            except re.error:
-                matcher = None
-        else:
-            # simple substring search later
-            pass
+    stream = (request.values.get("stream") or "").strip().lower() in ("1", "ndjson")
+    try:
+        timed = _time_window(name, log) if os.path.exists(path) else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not os.path.exists(path) and not members:
+        if stream:
+            return _stream_response(iter([{"done": True, "name": name, "count": 0, "truncated": False}]))
+        return jsonify({"name": name, "matches": [], "truncated": False})
+
+    events, total, mode = _log_events(name, path, members, query, timed, request.args.get("parallel"))
+
+    def _log_result(count: int, truncated: bool) -> None:
+        _log.info(
+            "Search %s: query=%r regex=%s case=%s context=%d limit=%d results=%d truncated=%s mode=%s%s",
+            name,
+            query.q,
+            query.regex,
+            query.case,
+            query.context,
+            query.limit,
+            count,
+            truncated,
+            mode,
+            " (streamed)" if stream else "",
+        )
 
-    results: List[Dict[str, Any]] = []
-    if not os.path.exists(path):
-        return jsonify({"name": name, "matches": results, "truncated": False})
+    if stream:
+        return _stream_response(_search_frames(name, events, total, _log_result))
 
+    results: List[Dict[str, Any]] = []
+    truncated = False
     try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            buf: List[str] = []
-            idx = 0
-            for raw_line in f:
-                line = raw_line.rstrip("\n")
-                matched = False
-                if not q:
-                    matched = True
-                elif matcher is not None:
-                    matched = matcher.search(line) is not None
-                else:
-                    cmp_a = line if case_sensitive else line.lower()
-                    cmp_b = q if case_sensitive else q.lower()
-                    matched = cmp_b in cmp_a
-
-                buf.append(line)
-                if matched:
-                    start = max(0, len(buf) - 1 - context)
-                    context_block = buf[start:]
-                    results.append({
-                        "line": idx + 1,
-                        "text": line,
-                        "context_before": context_block[:-1] if context > 0 else [],
-                    })
-                    if len(results) >= limit:
-                        break
-                if len(buf) > context + 1:
-                    buf.pop(0)
-                idx += 1
+        results, truncated = collect(events)
     except Exception:
-        pass
-
-    truncated = len(results) >= limit
-    _log.info(
-        "Search %s: query=%r regex=%s case=%s context=%d limit=%d results=%d truncated=%s",
-        name,
-        q,
-        use_regex,
-        case_sensitive,
-        context,
-        limit,
-        len(results),
-        truncated,
-    )
+        _log.exception("Search %s failed (mode=%s)", name, mode)
+    _log_result(len(results), truncated)
     return jsonify({"name": name, "matches": results, "truncated": truncated})
 
 
+@bp.route("/logs/search", methods=["GET", "POST"])
+def search_logs():
+    """Search several configured logs at once, merged by timestamp.
+
+    ``logs=a,b,c`` selects entries (default: all). Takes the same
+    parameters as the per-log search, including ``start``/``end``, and
+    always streams NDJSON: match batches carrying ``log`` and ``ts``, then
+    a ``done`` frame. At most ``limit`` matches are sent in total.
+    """
+    cfg = load_config()
+    wanted = [n.strip() for n in (request.args.get("logs") or "").split(",") if n.strip()]
+    logs = [get_log_by_name(cfg, n) for n in wanted] if wanted else list(cfg.get("logs", []))
+    missing = [n for n, log in zip(wanted, logs) if not log]
+    if missing:
+        return jsonify({"error": f"unknown logs: {', '.join(missing)}"}), 404
+    try:
+        query = _search_query()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    sources = []
+    modes: Dict[str, str] = {}
+    for log in logs:
+        name, path = log["name"], log["path"]
+        members = _members(log)
+        if not os.path.exists(path) and not members:
+            continue
+        try:
+            timed = _time_window(name, log) if os.path.exists(path) else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # Each log needs its own query: the time window carries its parser
+        log_query = query.with_limit(query.limit)
+        events, _, modes[name] = _log_events(name, path, members, log_query, timed)
+        hint = os.path.getmtime(path) if os.path.exists(path) else None
+        parser = timed[0].parser if timed else parser_for(log, year_hint=hint)
+        sources.append((name, events, parser))
+    names = [s[0] for s in sources]
+
+    def _log_result(count: int, truncated: bool) -> None:
+        _log.info(
+            "Search %d logs %s: query=%r regex=%s case=%s limit=%d results=%d truncated=%s modes=%s",
+            len(names), ",".join(names), query.q, query.regex, query.case, query.limit, count, truncated, modes,
+        )
+
+    return _stream_response(_search_frames(",".join(names), iter_merged(sources, query.limit), 0, _log_result))
+
+
+def _search_frames(name: str, events: Iterator[Any], total: int, on_done) -> Iterator[Dict[str, Any]]:
+    """Turn search events into NDJSON frames for ``/search?stream=1``.
+
+    Matches are sent in batches, flushed at least every
+    ``_SEARCH_FLUSH_SECS`` or at each progress event, so results appear
+    while a large file is still being scanned. Closing this generator
+    (client disconnect) closes ``events``, which stops the scan and
+    cancels any queued worker chunks.
+    """
+    batch: List[Dict[str, Any]] = []
+    count = 0
+    truncated = False
+    last_flush = time.time()
+    try:
+        for kind, value in events:
+            if kind == "match":
+                batch.append(value)
+                count += 1
+                if len(batch) >= _SEARCH_BATCH or time.time() - last_flush >= _SEARCH_FLUSH_SECS:
+                    yield {"matches": batch}
+                    batch = []
+                    last_flush = time.time()
+            elif kind == "progress":
+                if batch:
+                    yield {"matches": batch}
+                    batch = []
+                yield {"progress": {"scanned": value, "total": total}}
+                last_flush = time.time()
+            elif kind == "done":
+                truncated = value
+        if batch:
+            yield {"matches": batch}
+        on_done(count, truncated)
+        yield {"done": True, "name": name, "count": count, "truncated": truncated}
+    except Exception as e:
+        _log.exception("Streaming search %s failed", name)
+        yield {"done": True, "name": name, "count": count, "error": str(e)}
+    finally:
+        close = getattr(events, "close", None)
+        if close:
+            close()
+
+
 # ------------------ Profiles & Remote Access ------------------
 
 def _get_profile(pid: int) -> Optional[Dict[str, Any]]:
@@ -328,6 +675,7 @@ def update_profile(pid: int):
     vals = list(fields.values())
     vals.append(pid)
     conn = get_db()
+    before = conn.execute("SELECT * FROM profiles WHERE id=?", (pid,)).fetchone()
     try:
         cur = conn.execute(f"UPDATE profiles SET {sets} WHERE id=?", vals)
         conn.commit()
@@ -336,8 +684,14 @@ def update_profile(pid: int):
         return jsonify({"error": "profile name already exists"}), 409
     row = conn.execute("SELECT * FROM profiles WHERE id=?", (pid,)).fetchone()
     conn.close()
+    get_list_cache().invalidate(pid)
     if not row:
         abort(404)
+    # Only connection settings need a fresh transport; a rename keeps it
+    conn_keys = ("protocol", "host", "port", "username", "password")
+    if before is None or any(before[k] != row[k] for k in conn_keys):
+        get_pool().drop(pid)
+        get_health_monitor().forget(pid)
     result = row_to_dict(row)
     result["paths"] = _list_paths(pid)
     return jsonify(result)
@@ -350,6 +704,9 @@ def delete_profile(pid: int):
     conn.commit()
     deleted = cur.rowcount
     conn.close()
+    get_pool().drop(pid)
+    get_list_cache().invalidate(pid)
+    get_health_monitor().forget(pid)
     return jsonify({"ok": deleted > 0, "deleted": deleted})
 
 
@@ -431,20 +788,26 @@ def update_profile_path(ppid: int):
     if not sets:
         return jsonify({"error": "no fields"}), 400
     conn = get_db()
+    owner = conn.execute("SELECT profile_id FROM profile_paths WHERE id=?", (ppid,)).fetchone()
     cur = conn.execute(f"UPDATE profile_paths SET {', '.join(sets)} WHERE id=?", (*vals, ppid))
     conn.commit()
     updated = cur.rowcount
     conn.close()
+    if owner:
+        get_list_cache().invalidate(owner["profile_id"])
     return jsonify({"ok": updated > 0, "updated": updated})
 
 
 @bp.delete("/profile_paths/<int:ppid>")
 def delete_profile_path(ppid: int):
     conn = get_db()
+    owner = conn.execute("SELECT profile_id FROM profile_paths WHERE id=?", (ppid,)).fetchone()
     cur = conn.execute("DELETE FROM profile_paths WHERE id=?", (ppid,))
     conn.commit()
     deleted = cur.rowcount
     conn.close()
+    if owner:
+        get_list_cache().invalidate(owner["profile_id"])
     return jsonify({"ok": deleted > 0, "deleted": deleted})
 
 
@@ -488,31 +851,443 @@ def add_profile_path(pid: int):
     return jsonify({"ok": True})
 
 
-def _ssh_exec(prof: Dict[str, Any], command: str, timeout: int = 15) -> Dict[str, Any]:
+def _ssh_exec(prof: Dict[str, Any], command: str, timeout: int = 15, stdin: Optional[bytes] = None) -> Dict[str, Any]:
     try:
-        import paramiko
+        import paramiko  # noqa: F401
     except Exception as e:
         return {"ok": False, "error": f"paramiko not available: {e}"}
     try:
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        client.connect(
-            hostname=prof["host"],
-            port=int(prof.get("port") or 22),
-            username=prof.get("username") or None,
-            password=prof.get("password") or None,
-            timeout=timeout,
-            look_for_keys=False,
-            allow_agent=False,
+        return get_pool().exec(prof, command, timeout=timeout, stdin=stdin)
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+def _sh_q(s: str) -> str:
+    return "'" + s.replace("'", "'\"'\"'") + "'"
+
+
+def _cat_command(pattern: str, greps: List[str], suffix: str, max_lines: int, watchlist: bool = False) -> str:
+    # Build safe shell command using bash -lc so globbing works. Pattern left unquoted to expand.
+    # Grep argument is safely single-quoted (with proper escaping of single quotes).
+    # Use tail to limit to the last N lines
+    cmd_inner = f"tail -n {max_lines} -- {pattern}"
+    for g in greps:
+        cmd_inner += f" | grep -F -- {_sh_q(g)}"
+    if watchlist:
+        # Terms arrive on stdin, one per line: a large list would overflow the
+        # argv limit. printf is a builtin, so the list never becomes an argument.
+        cmd_inner = "t=$(cat); " + cmd_inner + " | grep -F -f <(printf '%s\\n' \"$t\")"
+    if suffix:
+        cmd_inner += f" | {suffix.replace("'", "'\"'\"'")}"
+    return f"bash -lc {_sh_q(cmd_inner)}"
+
+
+def _get_tail_engine() -> str:
+    try:
+        cfg = load_config()
+        api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+        return str(api_cfg.get("tail_engine", "sftp")).lower()
+    except Exception:
+        return "sftp"
+
+
+def _sftp_tail_path(pattern: str) -> Optional[str]:
+    """Return the SFTP path for ``pattern`` if it names one file without shell expansion."""
+    if not pattern or (_GLOB_CHARS | _SHELL_CHARS) & set(pattern) or any(c.isspace() for c in pattern):
+        return None
+    if pattern == "~":
+        return None
+    if pattern.startswith("~/"):
+        # SFTP sessions start in the login directory
+        return pattern[2:] or None
+    if pattern.startswith("~"):
+        return None
+    return pattern
+
+
+def _sftp_cat(
+    prof: Dict[str, Any], path: str, greps: List[str], max_lines: int, terms: Optional[TermMatcher] = None
+) -> Dict[str, Any]:
+    """Tail a remote file over SFTP and apply the grep chain locally.
+
+    Same semantics as ``tail -n N | grep -F ...``: the last ``max_lines``
+    lines are taken first, then filtered by every grep term. No remote shell
+    is started, so login profiles are not sourced.
+    """
+    try:
+        with get_pool().sftp(prof, timeout=_get_ssh_timeout()) as sftp:
+            with sftp.open(path, "rb") as f:
+                # Every read is a round-trip over SFTP, so scan in larger blocks
+                data = _tail_block_scan(f, max_lines, block=65536)
+    except FileNotFoundError:
+        return {"ok": False, "error": f"tail: cannot open '{path}' for reading: No such file or directory"}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    lines = data.decode("utf-8", errors="replace").splitlines()[-max_lines:]
+    for g in greps:
+        lines = [ln for ln in lines if g in ln]
+    if terms is not None:
+        lines = [ln for ln in lines if terms.search(ln)]
+    return {"ok": True, "lines": lines[:5000]}
+
+
+def _remote_cat(
+    prof: Dict[str, Any], pattern: str, greps: List[str], suffix: str, max_lines: int, terms: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Tail a remote file (or glob) with the grep chain; returns ``{ok, lines|error}``.
+
+    With a ``terms`` watchlist only lines containing a term are kept and
+    ``matched`` lists the terms found on each returned line.
+    """
+    matcher = TermMatcher(terms, case=True) if terms else None
+    # Plain single-file tails go over SFTP; globs and cmd_suffix need the shell
+    sftp_path = None if suffix else _sftp_tail_path(pattern)
+    if sftp_path and _get_tail_engine() == "sftp":
+        res = _sftp_cat(prof, sftp_path, greps, max_lines, matcher)
+    else:
+        res = _ssh_exec(
+            prof,
+            _cat_command(pattern, greps, suffix, max_lines, watchlist=bool(terms)),
+            timeout=_get_ssh_timeout(),
+            stdin=("\n".join(terms) + "\n").encode("utf-8") if terms else None,
+        )
+        if not res.get("ok"):
+            return {"ok": False, "error": res.get("error") or res.get("err") or "ssh error"}
+        # Return capped lines to avoid overload (safety cap remains 5000)
+        lines = (res.get("out") or "").splitlines()
+        if len(lines) > 5000:
+            lines = lines[:5000]
+        res = {"ok": True, "lines": lines}
+    if matcher is not None and res.get("ok"):
+        res["matched"] = [matcher.matched(ln) for ln in res["lines"]]
+    return res
+
+
+def _encode_cursor(inode: int, offset: int) -> str:
+    raw = json.dumps({"i": inode, "o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Optional[tuple[int, int]]:
+    """Return ``(inode, offset)`` from an opaque cursor, or None if invalid."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        inode, offset = int(data["i"]), int(data["o"])
+    except Exception:
+        return None
+    if inode < 0 or offset < 0:
+        return None
+    return inode, offset
+
+
+def _cursor_command(pattern: str, greps: List[str], suffix: str, max_lines: int, cur: Optional[tuple[int, int]]) -> str:
+    # Print "<inode> <size> <mode>" first, then either the bytes appended since
+    # the cursor (delta) or a normal tail (full) when the file was rotated or
+    # truncated. The delta is bounded by the stat'ed size so the next cursor
+    # starts exactly where this read stopped.
+    filters = ""
+    for g in greps:
+        filters += f" | grep -F -- {_sh_q(g)}"
+    if suffix:
+        filters += f" | {suffix.replace("'", "'\"'\"'")}"
+    full = f'echo "$1 $2 full"; tail -n {max_lines} -- "$p"{filters}'
+    cmd_inner = f"p={pattern}; s=$(stat -L -c '%i %s' -- \"$p\") || exit 1; set -- $s; "
+    if cur is None:
+        cmd_inner += full
+    else:
+        ino, off = cur
+        cmd_inner += (
+            f'if [ "$1" = {ino} ] && [ "$2" -ge {off} ]; then echo "$1 $2 delta"; '
+            f'tail -c +{off + 1} -- "$p" | head -c $(($2 - {off})) | tail -n {max_lines}{filters}; '
+            f"else {full}; fi"
         )
-        stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
-        out = stdout.read().decode("utf-8", errors="replace")
-        err = stderr.read().decode("utf-8", errors="replace")
-        code = stdout.channel.recv_exit_status()
-        client.close()
-        return {"ok": code == 0, "out": out, "err": err, "code": code}
+    return f"bash -lc {_sh_q(cmd_inner)}"
+
+
+def _remote_cat_since(
+    prof: Dict[str, Any], pattern: str, greps: List[str], suffix: str, max_lines: int, cursor: str
+) -> Dict[str, Any]:
+    """Tail a single remote file, returning only lines appended since ``cursor``.
+
+    Returns ``{ok, lines, cursor, reset}``; ``reset`` is True when a full tail
+    was sent because there was no valid cursor or the file was rotated
+    (inode changed) or truncated (size shrank).
+    """
+    cur = _decode_cursor(cursor)
+    res = _ssh_exec(prof, _cursor_command(pattern, greps, suffix, max_lines, cur), timeout=_get_ssh_timeout())
+    out = res.get("out") or ""
+    header, _, body = out.partition("\n")
+    parts = header.split()
+    # grep exits 1 on no match; the header alone proves the file was read
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+        return {"ok": False, "error": res.get("error") or res.get("err") or "ssh error"}
+    lines = body.splitlines()
+    if len(lines) > 5000:
+        lines = lines[:5000]
+    return {
+        "ok": True,
+        "lines": lines,
+        "cursor": _encode_cursor(int(parts[0]), int(parts[1])),
+        "reset": parts[2] != "delta",
+    }
+
+
+def _filter_files_by_kind(files: List[str], kind: str) -> List[str]:
+    if kind == "image":
+        return [f for f in files if any(f.lower().endswith("."+e) for e in IMG_EXTS)]
+    if kind == "text":
+        return [f for f in files if any(f.lower().endswith("."+e) for e in TXT_EXTS)]
+    return files
+
+
+def _remote_list(prof: Dict[str, Any], pattern: str, kind: str, limit: int) -> Dict[str, Any]:
+    """Expand a remote glob to regular files; returns ``{ok, files|error}``."""
+    # Expand via glob and list files; then filter by extension in Python
+    script = (
+        "shopt -s nullglob dotglob; "
+        f"for f in {pattern}; do [ -f \"$f\" ] && echo \"$f\"; done | head -n {limit}"
+    )
+    cmd = f"bash -lc {_sh_q(script)}"
+    res = _ssh_exec(prof, cmd, timeout=_get_ssh_timeout())
+    if not res.get("ok"):
+        return {"ok": False, "error": res.get("error") or res.get("err") or "ssh error"}
+    files = _filter_files_by_kind((res.get("out") or "").splitlines(), kind)
+    return {"ok": True, "files": files[:limit]}
+
+
+def _sftp_glob(sftp, pattern: str) -> List[tuple[str, Any]]:
+    """Expand ``pattern`` with ``listdir_attr`` + ``fnmatch``; returns ``[(path, attrs)]`` of regular files.
+
+    Only directories under a glob component are listed (one round-trip
+    each); literal components are joined without a request, and symlinks
+    are resolved like ``[ -f ]`` does.
+    """
+    if pattern.startswith("~/"):
+        pattern = pattern[2:]  # SFTP sessions start in the login directory
+    parts = [p for p in pattern.split("/") if p]
+    dirs = ["/" if pattern.startswith("/") else ""]
+
+    def join(d: str, name: str) -> str:
+        return (d.rstrip("/") + "/" + name) if d else name
+
+    def resolve(path: str, attrs: Any) -> Any:
+        if attrs is not None and stat.S_ISLNK(attrs.st_mode or 0):
+            try:
+                return sftp.stat(path)
+            except OSError:
+                return None
+        return attrs
+
+    files: List[tuple[str, Any]] = []
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        nxt: List[str] = []
+        for d in dirs:
+            if _GLOB_CHARS & set(part):
+                try:
+                    entries = sftp.listdir_attr(d or ".")
+                except OSError:
+                    continue
+                for a in sorted(entries, key=lambda e: e.filename):
+                    if a.filename in (".", "..") or not fnmatch.fnmatchcase(a.filename, part):
+                        continue
+                    path = join(d, a.filename)
+                    a = resolve(path, a)
+                    if a is None:
+                        continue
+                    if last and stat.S_ISREG(a.st_mode or 0):
+                        files.append((path, a))
+                    elif not last and stat.S_ISDIR(a.st_mode or 0):
+                        nxt.append(path)
+            elif last:
+                path = join(d, part)
+                try:
+                    a = sftp.stat(path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(a.st_mode or 0):
+                    files.append((path, a))
+            else:
+                nxt.append(join(d, part))
+        dirs = nxt
+    return files
+
+
+def _remote_list_meta(prof: Dict[str, Any], pattern: str, kind: str, limit: int, sort: str, desc: bool) -> Dict[str, Any]:
+    """List matching files with size/mtime/mode over SFTP, sorted server-side.
+
+    Returns ``{ok, files: [{path, size, mtime, mode}]|error}``; the limit is
+    applied after sorting, so ``sort=mtime`` yields the newest N files.
+    """
+    if "$" in pattern or "`" in pattern or (pattern.startswith("~") and not pattern.startswith("~/")):
+        return {"ok": False, "error": "pattern needs shell expansion; use meta=0"}
+    try:
+        with get_pool().sftp(prof, timeout=_get_ssh_timeout()) as sftp:
+            found = _sftp_glob(sftp, pattern)
     except Exception as e:
         return {"ok": False, "error": str(e)}
+    keep = set(_filter_files_by_kind([p for p, _ in found], kind))
+    items = [
+        {"path": p, "size": int(a.st_size or 0), "mtime": int(a.st_mtime or 0), "mode": stat.filemode(a.st_mode or 0)}
+        for p, a in found
+        if p in keep
+    ]
+    if sort in ("mtime", "size"):
+        items.sort(key=lambda it: it[sort], reverse=desc)
+    elif desc:
+        items.reverse()
+    return {"ok": True, "files": items[:limit]}
+
+
+def _cached_remote_list(prof: Dict[str, Any], pattern: str, kind: str, limit: int) -> Dict[str, Any]:
+    """``_remote_list`` behind the per-profile glob cache (``api.list_cache_ttl``)."""
+    return get_list_cache().get(
+        prof, pattern, kind, limit, lambda: _remote_list(prof, pattern, kind, limit), timeout=_get_ssh_timeout()
+    )
+
+
+def _multi_cat_command(pattern: str, greps: List[str], suffix: str, max_lines: int, limit: int, boundary: str) -> str:
+    # Expand the glob and tail every text file in one remote script. Each file's
+    # output is preceded by "\n<boundary> <path>\n"; the leading newline keeps
+    # the marker on its own line even if the previous file lacked a final one.
+    # When tail fails, its stderr follows the output as "\n<boundary>! <error>\n":
+    # fd 3 keeps the real stdout while the substitution captures fd 4 only.
+    filters = ""
+    for g in greps:
+        filters += f" | grep -F -- {_sh_q(g)}"
+    if suffix:
+        filters += f" | {suffix.replace("'", "'\"'\"'")}"
+    exts = "|".join(f"*.{e}" for e in TXT_EXTS)
+    script = (
+        "exec 3>&1; shopt -s nullglob dotglob nocasematch; n=0; "
+        f"for f in {pattern}; do [ -f \"$f\" ] || continue; "
+        f"case \"$f\" in {exts}) ;; *) continue ;; esac; "
+        f"n=$((n+1)); [ $n -gt {limit} ] && break; "
+        f"printf '\\n%s %s\\n' {_sh_q(boundary)} \"$f\"; "
+        f"e=$( {{ {{ tail -n {max_lines} -- \"$f\" || printf '(exit %d)' $? >&2; }} 2>&4{filters}; }} 4>&1 1>&3 ); "
+        f"[ -z \"$e\" ] || printf '\\n%s! %s\\n' {_sh_q(boundary)} \"${{e//$'\\n'/ }}\"; "
+        "done"
+    )
+    return f"bash -lc {_sh_q(script)}"
+
+
+def _remote_multi_cat(
+    prof: Dict[str, Any], pattern: str, greps: List[str], suffix: str, max_lines: int, limit: int
+) -> Dict[str, Any]:
+    """Expand a remote glob and tail each text file in a single SSH exec.
+
+    Returns ``{ok, files: [{file, lines, error?}]|error}`` in glob order,
+    applying the same extension filter as ``_remote_list(kind="text")``. A
+    file whose ``tail`` failed carries the remote error message.
+    """
+    boundary = "@@file-" + uuid.uuid4().hex
+    res = _ssh_exec(prof, _multi_cat_command(pattern, greps, suffix, max_lines, limit, boundary), timeout=_get_ssh_timeout())
+    if not res.get("ok"):
+        return {"ok": False, "error": res.get("error") or res.get("err") or "ssh error"}
+    chunks = (res.get("out") or "").split("\n" + boundary)
+    files: List[Dict[str, Any]] = []
+    for i, chunk in enumerate(chunks[1:], start=1):
+        if chunk.startswith("! "):
+            if files:
+                files[-1]["error"] = chunk[2:].partition("\n")[0].strip()
+            continue
+        name, _, body = chunk[1:].partition("\n")
+        if i < len(chunks) - 1 and body.endswith("\n"):
+            # Drop the newline the next marker added
+            body = body[:-1]
+        files.append({"file": name, "lines": body.splitlines()[:5000]})
+    return {"ok": True, "files": files}
+
+
+def _get_stream_max_bytes() -> int:
+    try:
+        cfg = load_config()
+        api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+        return int(api_cfg.get("stream_max_bytes", 8 * 1024 * 1024))
+    except Exception:
+        return 8 * 1024 * 1024
+
+
+def _stream_remote_lines(prof: Dict[str, Any], command: str, max_lines: int, max_bytes: int) -> Iterator[Dict[str, Any]]:
+    """Run ``command`` on a pooled channel and yield line batches as they arrive.
+
+    Output is read in chunks and decoded incrementally, so a multi-byte
+    character split across reads is not mangled. Once ``max_lines`` lines or
+    ``max_bytes`` bytes have been read the channel is closed immediately.
+    Yields ``{"lines": [...]}`` frames and a final ``{"done": True, ...}``.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    sent = 0
+    received = 0
+    truncated = False
+    try:
+        with get_pool().channel(prof, timeout=_get_ssh_timeout()) as ch:
+            ch.exec_command(command)
+            while not truncated:
+                chunk = ch.recv(32768)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > max_bytes:
+                    chunk = chunk[: len(chunk) - (received - max_bytes)]
+                    truncated = True
+                parts = (pending + decoder.decode(chunk)).split("\n")
+                pending = parts.pop()
+                lines = [ln.rstrip("\r") for ln in parts]
+                if sent + len(lines) > max_lines:
+                    lines = lines[: max_lines - sent]
+                    truncated = True
+                if lines:
+                    sent += len(lines)
+                    yield {"lines": lines}
+            if truncated:
+                # Leaving the with-block closes the channel and stops the remote command
+                done: Dict[str, Any] = {"done": True, "lines": sent, "bytes": min(received, max_bytes), "truncated": True}
+            else:
+                pending += decoder.decode(b"", final=True)
+                if pending:
+                    # Unterminated last line still counts against the line budget
+                    if sent < max_lines:
+                        sent += 1
+                        yield {"lines": [pending.rstrip("\r")]}
+                    else:
+                        truncated = True
+                code = ch.recv_exit_status()
+                err = b""
+                while ch.recv_stderr_ready():
+                    err += ch.recv_stderr(32768)
+                done = {"done": True, "lines": sent, "bytes": received, "truncated": truncated, "code": code}
+                if code != 0:
+                    done["error"] = err.decode("utf-8", errors="replace") or f"exit status {code}"
+        yield done
+    except Exception as e:
+        yield {"done": True, "lines": sent, "error": str(e)}
+
+
+def _stream_response(frames: Iterator[Dict[str, Any]], sse: bool = False) -> Response:
+    """Wrap dict frames as an NDJSON (default) or Server-Sent Events response."""
+    def generate():
+        try:
+            for frame in frames:
+                if sse:
+                    event = "done" if frame.get("done") else "lines"
+                    yield f"event: {event}\ndata: {json.dumps(frame)}\n\n"
+                else:
+                    yield json.dumps(frame) + "\n"
+        finally:
+            close = getattr(frames, "close", None)
+            if close:
+                close()
+
+    mimetype = "text/event-stream" if sse else "application/x-ndjson"
+    resp = Response(generate(), mimetype=mimetype)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
 
 
 @bp.get("/profiles/<int:pid>/cat")
@@ -544,26 +1319,129 @@ def ssh_cat(pid: int):
         max_lines = 5000
     if not pattern:
         return jsonify({"error": "pattern required"}), 400
-    # Build safe shell command using bash -lc so globbing works. Pattern left unquoted to expand.
-    # Grep argument is safely single-quoted (with proper escaping of single quotes).
-    def sh_q(s: str) -> str:
-        return "'" + s.replace("'", "'\"'\"'") + "'"
-
-    # Use tail to limit to the last N lines
-    cmd_inner = f"tail -n {max_lines} -- {pattern}"
+    try:
+        terms = parse_terms(request.args.getlist("terms"))
+        TermMatcher(terms, case=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mode = (request.args.get("stream") or "").strip().lower()
+    if terms and (mode in ("1", "ndjson", "sse") or "cursor" in request.args):
+        return jsonify({"error": "terms is not supported with stream or cursor"}), 400
+    if mode in ("1", "ndjson", "sse"):
+        try:
+            max_bytes = int(request.args.get("max_bytes", 0)) or _get_stream_max_bytes()
+        except Exception:
+            max_bytes = _get_stream_max_bytes()
+        max_bytes = max(1, min(max_bytes, _get_stream_max_bytes()))
+        cmd = _cat_command(pattern, greps, suffix, max_lines)
+        return _stream_response(_stream_remote_lines(prof, cmd, max_lines, max_bytes), sse=(mode == "sse"))
+    if "cursor" in request.args and _sftp_tail_path(pattern) is not None:
+        # Single literal path: hand back a cursor so the next poll only fetches
+        # the delta. Anything the shell would expand gets the plain tail instead.
+        cursor = request.args.get("cursor", "")
+        res = _inflight.do(
+            ("cat_since", pid, pattern, tuple(greps), suffix, max_lines, cursor),
+            lambda: _remote_cat_since(prof, pattern, greps, suffix, max_lines, cursor),
+        )
+        if not res.get("ok"):
+            return jsonify({"error": res.get("error") or "ssh error"}), 502
+        return jsonify({
+            "pattern": pattern,
+            "grep": greps,
+            "lines": res["lines"],
+            "cursor": res["cursor"],
+            "reset": res["reset"],
+        })
+    res = _inflight.do(
+        ("cat", pid, pattern, tuple(greps), suffix, max_lines, tuple(terms)),
+        lambda: _remote_cat(prof, pattern, greps, suffix, max_lines, terms),
+    )
+    if not res.get("ok"):
+        return jsonify({"error": res.get("error") or "ssh error"}), 502
+    out = {"pattern": pattern, "grep": greps, "lines": res["lines"]}
+    if "matched" in res:
+        out["terms"] = terms
+        out["matched"] = res["matched"]
+    return jsonify(out)
+
+
+def _follow_command(pattern: str, greps: List[str], suffix: str) -> str:
+    # Start at the current end and keep following across rotations; greps
+    # must be line-buffered or output sits in the pipe buffer.
+    cmd_inner = f"tail -n 0 -F -- {pattern}"
     for g in greps:
-        cmd_inner += f" | grep -F -- {sh_q(g)}"
+        cmd_inner += f" | grep --line-buffered -F -- {_sh_q(g)}"
     if suffix:
         cmd_inner += f" | {suffix.replace("'", "'\"'\"'")}"
-    cmd = f"bash -lc {sh_q(cmd_inner)}"
-    res = _ssh_exec(prof, cmd, timeout=_get_ssh_timeout())
-    if not res.get("ok"):
-        return jsonify({"error": res.get("error") or res.get("err") or "ssh error"}), 502
-    # Return capped lines to avoid overload (safety cap remains 5000)
-    lines = (res.get("out") or "").splitlines()
-    if len(lines) > 5000:
-        lines = lines[:5000]
-    return jsonify({"pattern": pattern, "grep": greps, "lines": lines})
+    return f"bash -lc {_sh_q(cmd_inner)}"
+
+
+@bp.get("/profiles/<int:pid>/follow")
+def ssh_follow(pid: int):
+    """Follow a remote file (``tail -F``) and push new lines as Server-Sent Events.
+
+    Query params: ``pattern`` (required), ``grep`` (repeatable), ``cmd_suffix``
+    or ``path_id`` to use a registered path's grep_chain/cmd_suffix.
+    Subscribers of the same query share one SSH channel.
+    """
+    prof = _get_profile(pid)
+    if not prof:
+        abort(404)
+    if (prof.get("protocol") or "ssh").lower() != "ssh":
+        return jsonify({"error": "profile is not SSH"}), 400
+    pattern = request.args.get("pattern", "")
+    if "|" in pattern:
+        pattern = pattern.split("|", 1)[0].strip()
+    greps = request.args.getlist("grep")
+    suffix = request.args.get("cmd_suffix", "").strip()
+    path_id = request.args.get("path_id")
+    if path_id:
+        reg = next((p for p in _list_paths(pid) if str(p["id"]) == str(path_id)), None)
+        if not reg:
+            return jsonify({"error": "unknown path_id"}), 404
+        greps = greps or list(reg.get("grep_chain") or [])
+        suffix = suffix or reg.get("cmd_suffix") or ""
+        pattern = pattern or reg["path"]
+    if not pattern:
+        return jsonify({"error": "pattern required"}), 400
+    try:
+        heartbeat = max(1, int(request.args.get("heartbeat", 15)))
+    except Exception:
+        heartbeat = 15
+    command = _follow_command(pattern, greps, suffix)
+    hub = get_follow_hub()
+    try:
+        sub, stopped = hub.subscribe(prof, command, timeout=_get_ssh_timeout())
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 429
+    _log.info("Follow start profile=%s pattern=%s grep=%s", pid, pattern, greps)
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    frame = sub.get(timeout=heartbeat)
+                except queue.Empty:
+                    if stopped.is_set():
+                        # Channel ended but its final frame did not fit in our queue
+                        yield f"event: done\ndata: {json.dumps({'done': True})}\n\n"
+                        break
+                    # Comment line keeps proxies from timing out and surfaces disconnects
+                    yield ": heartbeat\n\n"
+                    continue
+                if frame.get("done"):
+                    yield f"event: done\ndata: {json.dumps(frame)}\n\n"
+                    break
+                yield f"event: lines\ndata: {json.dumps(frame)}\n\n"
+        finally:
+            hub.unsubscribe(pid, command, sub)
+            _log.info("Follow stop profile=%s pattern=%s", pid, pattern)
+
+    resp = Response(generate(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
 
 
 @bp.get("/profiles/<int:pid>/ping")
@@ -573,11 +1451,179 @@ def ssh_ping(pid: int):
         abort(404)
     if (prof.get("protocol") or "ssh").lower() != "ssh":
         return jsonify({"ok": False, "error": "profile is not SSH"})
-    # Execute a no-op command to verify connectivity
-    res = _ssh_exec(prof, "bash -lc 'true'", timeout=_get_ssh_timeout())
-    ok = bool(res.get("ok"))
-    err = res.get("error") or res.get("err") or (None if ok else "unknown error")
-    return jsonify({"ok": ok, "error": err})
+    # Answer from the background monitor; probe now only if it has no result yet
+    monitor = get_health_monitor()
+    st = None if request.args.get("fresh") in ("1", "true") else monitor.status(pid)
+    if st is None:
+        monitor.probe(prof)
+        st = monitor.status(pid) or {"ok": False, "error": "unknown error"}
+    return jsonify({
+        "ok": bool(st.get("ok")),
+        "error": st.get("error"),
+        "latency_ms": st.get("latency_ms"),
+        "checked": st.get("checked"),
+        "circuit": st.get("circuit"),
+    })
+
+
+def _get_run_limits() -> tuple[int, int]:
+    try:
+        cfg = load_config()
+        api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+        workers = int(api_cfg.get("run_workers", 16))
+        per_host = int(api_cfg.get("run_per_host", 4))
+    except Exception:
+        workers, per_host = 16, 4
+    return max(1, workers), max(1, per_host)
+
+
+class _RunFanout:
+    """Fan a run out over profiles -> paths -> files on a bounded thread pool.
+
+    Each finished unit of work is pushed to ``events`` as a dict; a ``None``
+    sentinel is queued once every submitted task has completed. Per-host
+    semaphores cap how many SSH commands run against one profile at a time.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]], max_lines: int, workers: int, per_host: int):
+        self.profiles = profiles
+        self.max_lines = max_lines
+        self.events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self.cancelled = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="run")
+        self._caps = {int(p["id"]): threading.BoundedSemaphore(per_host) for p in profiles}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if not self.profiles:
+            self.events.put(None)
+            return
+        for prof in self.profiles:
+            self._submit(self._run_profile, prof)
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args) -> None:
+        with self._lock:
+            self._pending += 1
+        try:
+            self._executor.submit(self._wrap, fn, *args)
+        except RuntimeError:
+            # Executor shut down (client went away)
+            self._done()
+
+    def _wrap(self, fn, *args) -> None:
+        try:
+            if not self.cancelled.is_set():
+                fn(*args)
+        except Exception as e:
+            _log.exception("Run task failed")
+            self.events.put({"type": "error", "error": str(e)})
+        finally:
+            self._done()
+
+    def _done(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            finished = self._pending == 0
+        if finished:
+            self.events.put(None)
+
+    def _ssh(self, prof: Dict[str, Any], fn, *args) -> Dict[str, Any]:
+        with self._caps[int(prof["id"])]:
+            return fn(prof, *args)
+
+    def _run_profile(self, prof: Dict[str, Any]) -> None:
+        base = {"profile_id": prof["id"], "profile": prof.get("name")}
+        # A host whose circuit is open is skipped at once instead of waiting out
+        # the SSH timeout again. The decision is the breaker's, so a single miss
+        # below ``health_fail_threshold`` does not mark the host down here.
+        monitor = get_health_monitor()
+        pid = int(prof["id"])
+        if monitor.status(pid) is None:
+            self._ssh(prof, monitor.probe)
+        reason = monitor.check(pid)
+        if reason:
+            self.events.put({**base, "type": "profile", "ok": False, "error": reason})
+            return
+        self.events.put({**base, "type": "profile", "ok": True})
+        for path_obj in _list_paths(int(prof["id"])):
+            self._submit(self._run_path, prof, path_obj)
+
+    def _run_path(self, prof: Dict[str, Any], path_obj: Dict[str, Any]) -> None:
+        base = {"profile_id": prof["id"], "profile": prof.get("name"), "path": path_obj["path"]}
+        typ = str(path_obj.get("type") or "text").lower()
+        pattern = path_obj["path"]
+        kind = "image" if typ == "image" else _infer_path_type(pattern)
+        if kind == "image":
+            res = self._ssh(prof, _cached_remote_list, pattern, kind, self.max_lines)
+            if not res.get("ok"):
+                self.events.put({**base, "type": "error", "error": res.get("error")})
+                return
+            self.events.put({**base, "type": "image", "files": res["files"]})
+            return
+        # Text paths: expand and tail every match in one round-trip
+        res = self._ssh(
+            prof,
+            _remote_multi_cat,
+            pattern,
+            path_obj.get("grep_chain") or [],
+            path_obj.get("cmd_suffix") or "",
+            self.max_lines,
+            self.max_lines,
+        )
+        if not res.get("ok"):
+            self.events.put({**base, "type": "error", "error": res.get("error")})
+            return
+        for item in res["files"]:
+            self.events.put({**base, "path_id": path_obj.get("id"), "type": "file", **item})
+
+
+@bp.post("/run")
+def run_profiles():
+    """Run every registered path of the selected SSH profiles in parallel.
+
+    Body: ``{ profile_ids: [..], lines: N }``. Streams NDJSON events
+    (``profile``, ``image``, ``file``, ``error``) as each unit finishes and
+    ends with ``{type: "done"}``.
+    """
+    data = request.get_json(force=True, silent=True) or {}
+    ids = data.get("profile_ids") or []
+    try:
+        max_lines = int(data.get("lines", 200))
+    except Exception:
+        max_lines = 200
+    max_lines = max(1, min(max_lines, 5000))
+    profiles: List[Dict[str, Any]] = []
+    for pid in ids:
+        try:
+            prof = _get_profile(int(pid))
+        except Exception:
+            prof = None
+        if prof and (prof.get("protocol") or "ssh").lower() == "ssh":
+            profiles.append(prof)
+    workers, per_host = _get_run_limits()
+    run = _RunFanout(profiles, max_lines, workers, per_host)
+    started = time.time()
+    _log.info("Run %d profiles (lines=%d workers=%d per_host=%d)", len(profiles), max_lines, workers, per_host)
+
+    def generate():
+        run.start()
+        try:
+            while True:
+                ev = run.events.get()
+                if ev is None:
+                    break
+                yield json.dumps(ev) + "\n"
+            yield json.dumps({"type": "done", "elapsed_ms": int((time.time() - started) * 1000)}) + "\n"
+        finally:
+            # Stops queued work when the client disconnects mid-stream
+            run.cancel()
+
+    return Response(generate(), mimetype="application/x-ndjson")
 
 
 @bp.get("/profiles/<int:pid>/ftp/list")
@@ -960,7 +2006,7 @@ def media_file(subpath: str):
 
 @bp.get("/profiles/<int:pid>/image")
 def ssh_image_preview(pid: int):
-    """Fetch remote image bytes for preview; caches in memory (no DB write)."""
+    """Fetch remote image bytes for preview; cached in memory and on disk (no DB write)."""
     prof = _get_profile(pid)
     if not prof:
         abort(404)
@@ -971,29 +2017,26 @@ def ssh_image_preview(pid: int):
         rpath = rpath.split("|", 1)[0].strip()
     if not rpath:
         return jsonify({"error": "path required"}), 400
-    content = _image_cache_get(int(pid), rpath)
-    if content is None:
+    thumb_size = _thumb_size_arg()
+    if thumb_size:
         try:
-            import paramiko
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(
-                hostname=prof["host"],
-                port=int(prof.get("port") or 22),
-                username=prof.get("username") or None,
-                password=prof.get("password") or None,
-                timeout=_get_ssh_timeout(),
-                look_for_keys=False,
-                allow_agent=False,
-            )
-            sftp = client.open_sftp()
-            with sftp.open(rpath, "rb") as f:
-                content = f.read()
-            sftp.close(); client.close()
-            if content:
-                _image_cache_put(int(pid), rpath, content)
+            thumb = _remote_thumbnail(prof, rpath, thumb_size)
         except Exception as e:
             return jsonify({"error": str(e)}), 502
+        if thumb is not None:
+            data, mimetype, etag = thumb
+            if etag in request.if_none_match:
+                resp = Response(status=304)
+            else:
+                resp = Response(data, mimetype=mimetype)
+            resp.set_etag(etag)
+            # Revalidated by ETag if the remote file changes
+            resp.headers["Cache-Control"] = "private, max-age=86400"
+            return resp
+    try:
+        content = _fetch_remote_image(prof, rpath)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
     if not content:
         abort(404)
     import mimetypes
@@ -1138,48 +2181,21 @@ def upload_record_image_remote(rid: int):
     if not prof:
         abort(404)
     # fetch data from cache or via SFTP
-    content = _image_cache_get(int(pid), rpath)
-    if content is None:
-        try:
-            import paramiko
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(
-                hostname=prof["host"],
-                port=int(prof.get("port") or 22),
-                username=prof.get("username") or None,
-                password=prof.get("password") or None,
-                timeout=_get_ssh_timeout(),
-                look_for_keys=False,
-                allow_agent=False,
-            )
-            sftp = client.open_sftp()
-            with sftp.open(rpath, "rb") as f:
-                content = f.read()
-            sftp.close()
-            client.close()
-            if content is None:
-                return jsonify({"error": "empty file"}), 502
-            if len(content) > 10 * 1024 * 1024:
-                return jsonify({"error": "file too large"}), 413
-            _image_cache_put(int(pid), rpath, content)
-        except Exception as e:
-            return jsonify({"error": str(e)}), 502
+    try:
+        content = _fetch_remote_image(prof, rpath, max_bytes=10 * 1024 * 1024)
+    except _TooLarge:
+        return jsonify({"error": "file too large"}), 413
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
+    if not content:
+        return jsonify({"error": "empty file"}), 502
     # persist to disk and DB
     conn = get_db()
     row = conn.execute("SELECT * FROM records WHERE id=?", (rid,)).fetchone()
     if not row:
         conn.close(); abort(404)
-    prof_name = None
-    if row["profile_id"]:
-        p = conn.execute("SELECT name FROM profiles WHERE id=?", (row["profile_id"],)).fetchone()
-        if p:
-            prof_name = p["name"]
     images_base = get_images_dir()
-    reg_base = row.get("file_path") if isinstance(row, dict) else row["file_path"]
-    reg_dir = _sanitize_rel_path(os.path.dirname(reg_base or ""))
-    folder = os.path.join(images_base, _secure_filename(prof_name or "_"), reg_dir)
-    os.makedirs(folder, exist_ok=True)
+    folder = _record_images_folder(conn, row)
     # derive filename from remote path
     filename_base = os.path.basename(rpath) or f"img_{int(time.time())}.bin"
     fname = _secure_filename(filename_base)
@@ -1194,6 +2210,170 @@ def upload_record_image_remote(rid: int):
     return jsonify({"ok": True, "path": rel_path, "url": _public_image_url(rel_path)})
 
 
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _record_images_folder(conn: sqlite3.Connection, row: sqlite3.Row) -> str:
+    """Folder for a record's attached remote images: <images>/<profile>/<registered dir>."""
+    prof_name = None
+    if row["profile_id"]:
+        p = conn.execute("SELECT name FROM profiles WHERE id=?", (row["profile_id"],)).fetchone()
+        if p:
+            prof_name = p["name"]
+    reg_base = row.get("file_path") if isinstance(row, dict) else row["file_path"]
+    reg_dir = _sanitize_rel_path(os.path.dirname(reg_base or ""))
+    folder = os.path.join(get_images_dir(), _secure_filename(prof_name or "_"), reg_dir)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _get_attach_workers() -> int:
+    try:
+        cfg = load_config()
+        api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+        return max(1, int(api_cfg.get("attach_workers", 4)))
+    except Exception:
+        return 4
+
+
+@bp.post("/records/<int:rid>/images_remote")
+def upload_record_images_remote(rid: int):
+    """Attach many remote images to a record in one call.
+
+    Body: ``{ profile_id, paths: [..] }``. Images are read concurrently
+    (``api.attach_workers``) with pipelined reads on one SFTP session of
+    the profile's pooled transport and streamed to disk; names already
+    taken in the record folder get a ``_N`` suffix. All ``record_images``
+    rows are inserted in one transaction at the end. Streams NDJSON: one ``{type: "image", path, ok,
+    url?|error?}`` per path, then ``{type: "done", added, failed}``.
+    """
+    data = request.get_json(force=True, silent=True) or {}
+    pid = data.get("profile_id")
+    paths = [str(p).strip() for p in (data.get("paths") or []) if str(p).strip()]
+    if not pid or not paths:
+        return jsonify({"error": "profile_id and paths required"}), 400
+    prof = _get_profile(int(pid))
+    if not prof:
+        abort(404)
+    conn = get_db()
+    row = conn.execute("SELECT * FROM records WHERE id=?", (rid,)).fetchone()
+    if not row:
+        conn.close(); abort(404)
+    images_base = get_images_dir()
+    folder = _record_images_folder(conn, row)
+    conn.close()
+    # Reserve unique file names up front so equal basenames from different
+    # dirs don't collide, nor overwrite images already in the folder
+    targets: Dict[str, str] = {}
+    used: set[str] = set()
+    for rpath in dict.fromkeys(paths):
+        base = _secure_filename(os.path.basename(rpath) or f"img_{int(time.time())}.bin")
+        stem, ext = os.path.splitext(base)
+        name, n = base, 1
+        while name in used or os.path.exists(os.path.join(folder, name)):
+            name = f"{stem}_{n}{ext}"
+            n += 1
+        used.add(name)
+        targets[rpath] = os.path.join(folder, name)
+    max_bytes = 10 * 1024 * 1024
+
+    def attach(sftp: Any, rpath: str) -> Dict[str, Any]:
+        """Stream one remote file into its reserved name over the batch's SFTP session."""
+        abs_path = targets[rpath]
+        tmp = f"{abs_path}.{threading.get_ident()}.part"
+        try:
+            cached = _image_cache_get(int(prof["id"]), rpath)
+            if cached is not None:
+                if len(cached) > max_bytes:
+                    raise _TooLarge(rpath)
+                with open(tmp, "wb") as out:
+                    out.write(cached)
+                size = len(cached)
+            else:
+                rsize = int(sftp.stat(rpath).st_size or 0)
+                if rsize > max_bytes:
+                    raise _TooLarge(rpath)
+                size = 0
+                with sftp.open(rpath, "rb") as f, open(tmp, "wb") as out:
+                    # Pipelined reads: requests for the whole file go out at once
+                    f.prefetch(rsize)
+                    while True:
+                        chunk = f.read(65536)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise _TooLarge(rpath)
+                        out.write(chunk)
+            if not size:
+                raise ValueError("empty file")
+            os.replace(tmp, abs_path)
+        except _TooLarge:
+            _remove_quietly(tmp)
+            return {"type": "image", "path": rpath, "ok": False, "error": "file too large"}
+        except Exception as e:
+            _remove_quietly(tmp)
+            return {"type": "image", "path": rpath, "ok": False, "error": str(e)}
+        rel_path = os.path.relpath(abs_path, images_base).replace("\\", "/")
+        return {"type": "image", "path": rpath, "ok": True, "rel_path": rel_path}
+
+    workers = min(_get_attach_workers(), len(targets))
+    _log.info("Attach %d remote images to record %s (workers=%d)", len(targets), rid, workers)
+
+    def generate():
+        added: List[str] = []
+        failed = 0
+        try:
+            # One SFTP session for the whole batch; paramiko multiplexes the
+            # workers' requests on it
+            sftp_cm = get_pool().sftp(prof, timeout=_get_ssh_timeout())
+            sftp = sftp_cm.__enter__()
+        except Exception as e:
+            for rp in targets:
+                yield json.dumps({"type": "image", "path": rp, "ok": False, "error": str(e)}) + "\n"
+            yield json.dumps({"type": "done", "added": 0, "failed": len(targets)}) + "\n"
+            return
+        ex = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="attach")
+        futures = [ex.submit(attach, sftp, rp) for rp in targets]
+        try:
+            for fut in as_completed(futures):
+                res = fut.result()
+                if res["ok"]:
+                    added.append(res["rel_path"])
+                    res["url"] = _public_image_url(res["rel_path"])
+                else:
+                    failed += 1
+                yield json.dumps(res) + "\n"
+        finally:
+            # Also reached when the client disconnects mid-stream: skip fetches
+            # not yet started, let running ones finish and record every file
+            # already written so none is left on disk without a row
+            ex.shutdown(wait=True, cancel_futures=True)
+            sftp_cm.__exit__(None, None, None)
+            for fut in futures:
+                if fut.done() and not fut.cancelled() and fut.exception() is None:
+                    res = fut.result()
+                    if res["ok"] and res["rel_path"] not in added:
+                        added.append(res["rel_path"])
+            if added:
+                ts = int(time.time())
+                conn = get_db()
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO record_images(record_id, path, created_at) VALUES(?,?,?)",
+                        [(rid, rel, ts) for rel in added],
+                    )
+                conn.close()
+        yield json.dumps({"type": "done", "added": len(added), "failed": failed}) + "\n"
+
+    # url_for in the generator needs the request context
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @bp.delete("/record_images/<int:iid>")
 def delete_record_image(iid: int):
     conn = get_db()
@@ -1225,6 +2405,8 @@ def ssh_list(pid: int):
       - pattern: glob pattern (required)
       - type: 'image' or 'text' (optional; affects extension filtering)
       - limit: max files to return (default 200)
+      - meta: 1 to list over SFTP with size/mtime/mode per file
+      - sort/order: with meta, 'name' (default), 'mtime' (newest first) or 'size'; 'asc'/'desc'
     """
     prof = _get_profile(pid)
     if not prof:
@@ -1249,80 +2431,162 @@ def ssh_list(pid: int):
     # Determine type automatically if requested or missing
     if not kind or kind == "auto":
         kind = _infer_path_type(pattern)
-    def sh_q(s: str) -> str:
-        return "'" + s.replace("'", "'\"'\"'") + "'"
+    if request.args.get("meta") in ("1", "true"):
+        sort = (request.args.get("sort") or "name").lower()
+        order = (request.args.get("order") or ("desc" if sort == "mtime" else "asc")).lower()
+        res = _remote_list_meta(prof, pattern, kind, limit, sort, order == "desc")
+        if not res.get("ok"):
+            return jsonify({"error": res.get("error") or "ssh error"}), 502
+        return jsonify({"pattern": pattern, "type": kind or None, "files": res["files"], "sort": sort, "order": order})
+    if request.args.get("refresh") in ("1", "true"):
+        res = _remote_list(prof, pattern, kind, limit)
+    else:
+        res = _cached_remote_list(prof, pattern, kind, limit)
+    if not res.get("ok"):
+        return jsonify({"error": res.get("error") or "ssh error"}), 502
+    return jsonify({"pattern": pattern, "type": kind or None, "files": res["files"], "cached": bool(res.get("cached"))})
 
-    filter_case = ""
-    # no-op here; filtering is handled below with case patterns
 
-    # Expand via glob and list files; then filter by extension in Python
-    script = (
-        "shopt -s nullglob dotglob; "
-        f"for f in {pattern}; do [ -f \"$f\" ] && echo \"$f\"; done | head -n {limit}"
-    )
-    cmd = f"bash -lc {sh_q(script)}"
-    res = _ssh_exec(prof, cmd, timeout=_get_ssh_timeout())
+@bp.get("/profiles/<int:pid>/cat_many")
+def ssh_cat_many(pid: int):
+    """Expand a glob and tail every matching text file in one SSH round-trip.
+
+    Query params: ``pattern`` (required), ``grep`` (repeatable), ``cmd_suffix``,
+    ``lines`` per file (default 200) and ``limit`` files (default 200).
+    Returns ``{pattern, grep, files: [{file, lines}]}``.
+    """
+    prof = _get_profile(pid)
+    if not prof:
+        abort(404)
+    if (prof.get("protocol") or "ssh").lower() != "ssh":
+        return jsonify({"error": "profile is not SSH"}), 400
+    pattern = request.args.get("pattern", "").strip()
+    if "|" in pattern:
+        pattern = pattern.split("|", 1)[0].strip()
+    greps = request.args.getlist("grep")
+    suffix = request.args.get("cmd_suffix", "").strip()
+    try:
+        max_lines = int(request.args.get("lines", 200))
+    except Exception:
+        max_lines = 200
+    try:
+        limit = int(request.args.get("limit", 200))
+    except Exception:
+        limit = 200
+    max_lines = max(1, min(max_lines, 5000))
+    limit = max(1, min(limit, 5000))
+    if not pattern:
+        return jsonify({"error": "pattern required"}), 400
+    res = _remote_multi_cat(prof, pattern, greps, suffix, max_lines, limit)
     if not res.get("ok"):
-        return jsonify({"error": res.get("error") or res.get("err") or "ssh error"}), 502
-    files = (res.get("out") or "").splitlines()
-    if kind == "image":
-        files = [f for f in files if any(f.lower().endswith("."+e) for e in IMG_EXTS)]
-    elif kind == "text":
-        files = [f for f in files if any(f.lower().endswith("."+e) for e in TXT_EXTS)]
-    return jsonify({"pattern": pattern, "type": kind or None, "files": files[:limit]})
+        return jsonify({"error": res.get("error") or "ssh error"}), 502
+    return jsonify({"pattern": pattern, "grep": greps, "files": res["files"]})
 # ------------------ Image Cache (for remote image fetch) ------------------
-IMAGE_CACHE: Dict[str, Dict[str, Any]] = {}
-IMAGE_CACHE_TTL = 60  # seconds
-IMAGE_CACHE_MAX_BYTES = 20 * 1024 * 1024  # 20 MB
+def _image_cache_get(prof_id: int, path: str) -> Optional[bytes]:
+    return get_image_cache().get((int(prof_id), path))
 
 
-def _image_cache_key(prof_id: int, path: str) -> str:
-    return f"{prof_id}:{path}"
+def _image_cache_put(prof_id: int, path: str, data: bytes) -> None:
+    get_image_cache().put((int(prof_id), path), data)
 
 
-def _image_cache_get(prof_id: int, path: str) -> Optional[bytes]:
-    # Refresh limits from config
-    try:
-        cfg = load_config()
-        img_cfg = (cfg.get("images_cache") or {}) if isinstance(cfg.get("images_cache"), dict) else {}
-        global IMAGE_CACHE_TTL, IMAGE_CACHE_MAX_BYTES
-        if "ttl" in img_cfg:
-            IMAGE_CACHE_TTL = int(img_cfg.get("ttl") or IMAGE_CACHE_TTL)
-        if "max_bytes" in img_cfg:
-            IMAGE_CACHE_MAX_BYTES = int(img_cfg.get("max_bytes") or IMAGE_CACHE_MAX_BYTES)
-    except Exception:
-        pass
-    key = _image_cache_key(prof_id, path)
-    item = IMAGE_CACHE.get(key)
-    if not item:
-        return None
-    if time.time() - item.get("ts", 0) > IMAGE_CACHE_TTL:
-        IMAGE_CACHE.pop(key, None)
+class _TooLarge(Exception):
+    pass
+
+
+def _fetch_remote_image(prof: Dict[str, Any], rpath: str, max_bytes: Optional[int] = None) -> bytes:
+    """Return remote image bytes via memory LRU -> disk tier -> SFTP.
+
+    On a memory miss the file is stat'ed over SFTP; if the disk tier holds a
+    copy for the same (size, mtime) it is served from disk, otherwise the
+    file is downloaded on the same SFTP session and stored in both tiers.
+    Concurrent misses for the same file share one download.
+    Raises ``_TooLarge`` when the remote file exceeds ``max_bytes``.
+    """
+    pid = int(prof["id"])
+    content = _image_cache_get(pid, rpath)
+    if content is None:
+        try:
+            content = _inflight.do(("image", pid, rpath), lambda: _load_remote_image(prof, rpath, max_bytes))
+        except _TooLarge:
+            if max_bytes is not None:
+                raise
+            # The shared fetch was made on behalf of a caller with a size limit
+            content = _load_remote_image(prof, rpath, None)
+    if max_bytes is not None and len(content) > max_bytes:
+        raise _TooLarge(rpath)
+    return content
+
+
+def _load_remote_image(prof: Dict[str, Any], rpath: str, max_bytes: Optional[int]) -> bytes:
+    pid = int(prof["id"])
+    disk = get_image_disk_cache()
+    with get_pool().sftp(prof, timeout=_get_ssh_timeout()) as sftp:
+        st = sftp.stat(rpath)
+        rsize, rmtime = int(st.st_size or 0), int(st.st_mtime or 0)
+        if max_bytes is not None and rsize > max_bytes:
+            raise _TooLarge(rpath)
+        content = disk.get(pid, rpath, rsize, rmtime) if disk else None
+        if content is None:
+            with sftp.open(rpath, "rb") as f:
+                f.prefetch(rsize)
+                content = f.read()
+            if disk and content:
+                disk.put(pid, rpath, rsize, rmtime, content)
+    if content:
+        _image_cache_put(pid, rpath, content)
+    return content
+
+
+def _thumb_size_arg() -> int:
+    """Max thumbnail edge from ``size=`` (rounded up to ``THUMB_SIZES``) or ``thumb=1`` (256); 0 = full image."""
+    raw = request.args.get("size")
+    if raw:
+        try:
+            return thumb_size(int(raw))
+        except Exception:
+            return 0
+    return 256 if request.args.get("thumb") in ("1", "true") else 0
+
+
+def _remote_thumbnail(prof: Dict[str, Any], rpath: str, size: int) -> Optional[tuple[bytes, str, str]]:
+    """Return ``(bytes, mimetype, etag)`` of a thumbnail, or None if the image cannot be decoded.
+
+    When the disk tier already knows the content hash of this remote file
+    version (checked with one SFTP stat), a stored thumbnail is served
+    without downloading the original.
+    """
+    pid = int(prof["id"])
+    store = get_thumbnail_store()
+    disk = get_image_disk_cache()
+    if disk:
+        with get_pool().sftp(prof, timeout=_get_ssh_timeout()) as sftp:
+            st = sftp.stat(rpath)
+        sha = disk.lookup_sha(pid, rpath, int(st.st_size or 0), int(st.st_mtime or 0))
+        hit = store.get(sha, size) if sha else None
+        if hit:
+            return hit[0], hit[1], f"{sha[:32]}-{size}"
+    content = _fetch_remote_image(prof, rpath)
+    if not content:
         return None
-    return item.get("data")
+    sha = hashlib.sha256(content).hexdigest()
+    hit = store.get(sha, size)
+    if hit is None:
+        made = make_thumbnail(content, size)
+        if made is None:
+            return None
+        store.put(sha, size, made[0], made[1])
+        hit = made
+    return hit[0], hit[1], f"{sha[:32]}-{size}"
 
 
-def _image_cache_put(prof_id: int, path: str, data: bytes) -> None:
-    # Refresh limits from config
-    try:
-        cfg = load_config()
-        img_cfg = (cfg.get("images_cache") or {}) if isinstance(cfg.get("images_cache"), dict) else {}
-        global IMAGE_CACHE_TTL, IMAGE_CACHE_MAX_BYTES
-        if "ttl" in img_cfg:
-            IMAGE_CACHE_TTL = int(img_cfg.get("ttl") or IMAGE_CACHE_TTL)
-        if "max_bytes" in img_cfg:
-            IMAGE_CACHE_MAX_BYTES = int(img_cfg.get("max_bytes") or IMAGE_CACHE_MAX_BYTES)
-    except Exception:
-        pass
-    key = _image_cache_key(prof_id, path)
-    IMAGE_CACHE[key] = {"ts": time.time(), "data": data, "size": len(data)}
-    # Evict if over size
-    total = sum(v.get("size", 0) for v in IMAGE_CACHE.values())
-    if total <= IMAGE_CACHE_MAX_BYTES:
-        return
-    # Evict oldest until under budget
-    for k, v in sorted(IMAGE_CACHE.items(), key=lambda kv: kv[1].get("ts", 0)):
-        IMAGE_CACHE.pop(k, None)
-        total -= v.get("size", 0)
-        if total <= IMAGE_CACHE_MAX_BYTES:
-            break
+@bp.get("/images_cache")
+def images_cache_stats():
+    """Hit/miss/eviction counters and byte usage of the remote image cache."""
+    disk = get_image_disk_cache()
+    return jsonify({
+        **get_image_cache().stats(),
+        "disk": disk.stats() if disk else None,
+        "thumbs": get_thumbnail_store().stats(),
+        "single_flight": _inflight.stats(),
+    })
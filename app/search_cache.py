@@ -0,0 +1,180 @@
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config import load_config
+from .logsearch import Event, SearchQuery, iter_ranges
+
+
+class _Entry:
+    def __init__(self, inode: int, end: int, lines: int, matches: List[Dict[str, Any]], truncated: bool, tag: bytes):
+        self.inode = inode
+        self.end = end  # offset just past the last complete line scanned
+        self.tag = tag  # bytes just before ``end``; catches copytruncate rewrites
+        self.lines = lines  # complete lines before ``end``
+        self.matches = matches
+        self.truncated = truncated
+
+
+def _complete_end(path: str, size: int) -> int:
+    """Offset just past the last newline at or before ``size``."""
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            nl = f.read(step).rfind(b"\n")
+            if nl >= 0:
+                return pos - step + nl + 1
+            pos -= step
+    return 0
+
+
+def _count_newlines(path: str, start: int, end: int) -> int:
+    n = 0
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            data = f.read(min(1024 * 1024, end - pos))
+            if not data:
+                break
+            n += data.count(b"\n")
+            pos += len(data)
+    return n
+
+
+def _tag(path: str, end: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(max(0, end - 64))
+        return f.read(min(64, end))
+
+
+class SearchResultCache:
+    """Search results per (file, query), resumable on append-only logs.
+
+    An entry keeps the matches found up to the last complete line scanned
+    and that byte offset. Repeating the query on a grown file replays the
+    cached matches and scans only the appended bytes; a different inode or
+    a file shorter than the offset (rotation, truncation) drops the entry.
+    A result that already hit ``limit`` cannot change by appending, so it
+    is served as is.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._data: Dict[Tuple[Any, ...], _Entry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str, query: SearchQuery) -> Tuple[Any, ...]:
+        return (path,) + query.cache_key()
+
+    def _store(self, key: Tuple[Any, ...], entry: _Entry) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = entry
+            while len(self._data) > self.max_entries:
+                self._data.pop(next(iter(self._data)))
+
+    def _record(self, path: str, query: SearchQuery, inode: int, size: int,
+                events: Iterator[Event], prefix: List[Dict[str, Any]]) -> Iterator[Event]:
+        """Pass ``events`` (a scan up to ``size``) through and cache the result once it completes.
+
+        The line count at the cached offset comes from the scan's ``lines``
+        anchor plus the newlines between it and the offset (at most the
+        last line or chunk), not from a line index over the whole file.
+        """
+        found = list(prefix)
+        truncated = False
+        anchor: Optional[Tuple[int, int]] = None
+        try:
+            for kind, value in events:
+                if kind == "match":
+                    found.append(dict(value))
+                elif kind == "done":
+                    truncated = value
+                elif kind == "lines":
+                    anchor = value
+                    continue
+                yield kind, value
+        finally:
+            close = getattr(events, "close", None)
+            if close:
+                close()
+        if truncated:
+            self._store(self._key(path, query), _Entry(inode, size, 0, found, True, _tag(path, size)))
+            return
+        if anchor is None:
+            return  # the scan did not say where it ended; nothing safe to resume from
+        end = _complete_end(path, size)
+        offset, lines = anchor
+        if offset < end:
+            lines += _count_newlines(path, offset, end)
+        # An unterminated last line may still grow; rescan it next time
+        kept = [m for m in found if m["line"] <= lines]
+        self._store(self._key(path, query), _Entry(inode, end, lines, kept, False, _tag(path, end)))
+
+    def events(self, path: str, query: SearchQuery, full_scan: Iterator[Event], size: int) -> Iterator[Event]:
+        """Events for ``query``: from the cache plus the appended tail, or ``full_scan`` (which reads to ``size``)."""
+        st = os.stat(path)
+        key = self._key(path, query)
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is not None and (entry.inode != st.st_ino or st.st_size < entry.end or _tag(path, entry.end) != entry.tag):
+            entry = None
+            with self._lock:
+                self._data.pop(key, None)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            return self._record(path, query, st.st_ino, size, full_scan, [])
+        close = getattr(full_scan, "close", None)
+        if close:
+            close()
+        return self._resume(path, query, st, entry)
+
+    def _resume(self, path: str, query: SearchQuery, st: os.stat_result, entry: _Entry) -> Iterator[Event]:
+        for m in entry.matches:
+            yield "match", dict(m)
+        if entry.truncated:
+            yield "done", True
+            return
+        tail_query = query.with_limit(query.limit - len(entry.matches))
+        tail = iter_ranges(path, tail_query, [(entry.end, st.st_size, entry.lines + 1)])
+        yield from self._record(path, query, st.st_ino, st.st_size, tail, entry.matches)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+_CACHE: Optional[SearchResultCache] = None
+_CACHE_READY = False
+_CACHE_LOCK = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchResultCache]:
+    """Return the process-wide result cache, or None when ``api.search_cache_entries`` is 0.
+
+    Decided once, including the disabled case; config changes need a restart.
+    """
+    global _CACHE, _CACHE_READY
+    with _CACHE_LOCK:
+        if not _CACHE_READY:
+            _CACHE_READY = True
+            try:
+                cfg = load_config()
+                api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+                entries = int(api_cfg.get("search_cache_entries", 64))
+            except Exception:
+                entries = 64
+            if entries > 0:
+                _CACHE = SearchResultCache(max_entries=entries)
+        return _CACHE
+
@@ -0,0 +1,314 @@
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .config import load_config
+
+
+_log = logging.getLogger(__name__)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of connecting when the profile's host is marked down."""
+
+
+class _Entry:
+    """One authenticated SSH connection shared by all requests of a profile."""
+
+    def __init__(self, client, fingerprint: Tuple[Any, ...], max_sessions: int):
+        self.client = client
+        self.fingerprint = fingerprint
+        self.last_used = time.time()
+        self.in_use = 0
+        self.sessions = threading.BoundedSemaphore(max_sessions)
+        # Replaced in the pool while leases were still open; closed by the last one
+        self.retired = False
+
+    @property
+    def transport(self):
+        return self.client.get_transport()
+
+    def alive(self) -> bool:
+        t = self.transport
+        return t is not None and t.is_active()
+
+    def close(self) -> None:
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+def _fingerprint(prof: Dict[str, Any]) -> Tuple[Any, ...]:
+    # Any change in these fields means the cached connection is stale
+    return (
+        prof.get("host"),
+        int(prof.get("port") or 22),
+        prof.get("username") or None,
+        prof.get("password") or None,
+    )
+
+
+class SSHPool:
+    """Thread-safe pool of authenticated SSH transports keyed by profile id.
+
+    Each profile keeps one transport; callers open new channels (exec or
+    SFTP) on it instead of paying a TCP connect + key exchange + auth per
+    request. Broken transports are rebuilt on next use and idle ones are
+    closed by a background reaper thread.
+    """
+
+    def __init__(self, idle_timeout: int = 300, keepalive: int = 30, max_sessions: int = 8):
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.max_sessions = max(1, max_sessions)
+        self._entries: Dict[int, _Entry] = {}
+        self._lock = threading.Lock()
+        # Serialize connects per profile so concurrent callers share one handshake
+        self._connect_locks: Dict[int, threading.Lock] = {}
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Optional circuit breaker with ``check(pid) -> Optional[str]`` and
+        # ``failed(pid, error)``; installed by the health monitor
+        self.breaker: Any = None
+
+    # ------------- connection management -------------
+    def _connect(self, prof: Dict[str, Any], timeout: int):
+        import paramiko
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            hostname=prof["host"],
+            port=int(prof.get("port") or 22),
+            username=prof.get("username") or None,
+            password=prof.get("password") or None,
+            timeout=timeout,
+            look_for_keys=False,
+            allow_agent=False,
+        )
+        t = client.get_transport()
+        if t is not None and self.keepalive > 0:
+            t.set_keepalive(self.keepalive)
+        return client
+
+    def _acquire(
+        self, prof: Dict[str, Any], timeout: int, failed: Optional[_Entry] = None, gated: bool = True
+    ) -> _Entry:
+        """Return the profile's entry, connecting if needed.
+
+        ``failed`` is an entry a channel could not be opened on; it is
+        replaced unless another caller already did. A replaced transport
+        that other requests still use is left open until they finish.
+        Connect failures are reported to the breaker only for ``gated``
+        callers; ungated ones (health probes) record their own outcome.
+        """
+        pid = int(prof["id"])
+        fp = _fingerprint(prof)
+        with self._lock:
+            clock = self._connect_locks.setdefault(pid, threading.Lock())
+        with clock:
+            with self._lock:
+                entry = self._entries.get(pid)
+                stale = None
+                if entry and (entry is failed or entry.fingerprint != fp or not entry.alive()):
+                    self._entries.pop(pid, None)
+                    if entry.in_use > 0 and entry.alive():
+                        entry.retired = True
+                    else:
+                        stale = entry
+                    entry = None
+            if stale is not None:
+                _log.info("Rebuilding SSH transport for profile %s", pid)
+                stale.close()
+            if entry is None:
+                _log.debug("Opening SSH transport for profile %s (%s)", pid, prof.get("host"))
+                try:
+                    client = self._connect(prof, timeout)
+                except Exception as e:
+                    if gated and self.breaker is not None:
+                        self.breaker.failed(pid, str(e))
+                    raise
+                entry = _Entry(client, fp, self.max_sessions)
+                with self._lock:
+                    self._entries[pid] = entry
+            self._ensure_reaper()
+            return entry
+
+    def drop(self, pid: int) -> None:
+        """Forget the transport of a profile (e.g. after edits).
+
+        New requests connect afresh; one still in use by open channels
+        (follows, streams, runs) is closed when the last of them finishes.
+        """
+        with self._lock:
+            entry = self._entries.pop(int(pid), None)
+            if entry is None:
+                return
+            close = entry.in_use == 0
+            entry.retired = not close
+        _log.info("Dropping SSH transport for profile %s", pid)
+        if close:
+            entry.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                str(pid): {
+                    "alive": e.alive(),
+                    "in_use": e.in_use,
+                    "idle": int(time.time() - e.last_used),
+                }
+                for pid, e in self._entries.items()
+            }
+
+    # ------------- idle reaper -------------
+    def _ensure_reaper(self) -> None:
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, name="ssh-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(5, min(60, self.idle_timeout // 2 or 5))
+        while not self._stop.wait(interval):
+            self.reap()
+
+    def reap(self) -> None:
+        now = time.time()
+        expired = []
+        with self._lock:
+            for pid, e in list(self._entries.items()):
+                if e.in_use == 0 and (now - e.last_used > self.idle_timeout or not e.alive()):
+                    expired.append(self._entries.pop(pid))
+        for e in expired:
+            e.close()
+        if expired:
+            _log.debug("Reaped %d idle SSH transports", len(expired))
+
+    # ------------- channels -------------
+    def _checkout(self, entry: _Entry, timeout: int) -> None:
+        if not entry.sessions.acquire(timeout=timeout):
+            raise TimeoutError("too many concurrent sessions for profile")
+        with self._lock:
+            entry.in_use += 1
+
+    def _checkin(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.in_use = max(0, entry.in_use - 1)
+            entry.last_used = time.time()
+            close = entry.retired and entry.in_use == 0
+        entry.sessions.release()
+        if close:
+            entry.close()
+
+    @contextmanager
+    def _lease(self, prof: Dict[str, Any], timeout: int, opener, gated: bool = True) -> Iterator[Any]:
+        """Open a resource on the pooled transport, retrying once on a stale one."""
+        if gated and self.breaker is not None:
+            reason = self.breaker.check(int(prof["id"]))
+            if reason:
+                raise CircuitOpenError(reason)
+        entry = self._acquire(prof, timeout, gated=gated)
+        self._checkout(entry, timeout)
+        try:
+            res = opener(entry.transport)
+        except Exception as e:
+            import paramiko
+            if isinstance(e, paramiko.ChannelException) and entry.alive():
+                # Server refused the channel (e.g. MaxSessions); transport is fine
+                self._checkin(entry)
+                raise
+            # Transport looked alive but the server dropped it; rebuild once
+            _log.debug("Channel open failed for profile %s (%s); reconnecting", prof.get("id"), e)
+            self._checkin(entry)
+            entry = self._acquire(prof, timeout, failed=entry, gated=gated)
+            self._checkout(entry, timeout)
+            try:
+                res = opener(entry.transport)
+            except Exception:
+                self._checkin(entry)
+                raise
+        try:
+            yield res
+        finally:
+            try:
+                res.close()
+            except Exception:
+                pass
+            self._checkin(entry)
+
+    @contextmanager
+    def channel(self, prof: Dict[str, Any], timeout: int = 15, gated: bool = True) -> Iterator[Any]:
+        """Yield a fresh session channel on the profile's pooled transport.
+
+        ``gated=False`` skips the circuit breaker (used by health probes).
+        """
+        def _open(t):
+            ch = t.open_session(timeout=timeout)
+            ch.settimeout(timeout)
+            return ch
+
+        with self._lease(prof, timeout, _open, gated) as ch:
+            yield ch
+
+    @contextmanager
+    def sftp(self, prof: Dict[str, Any], timeout: int = 15) -> Iterator[Any]:
+        """Yield an SFTP client opened on the profile's pooled transport."""
+        def _open(t):
+            import paramiko
+            client = paramiko.SFTPClient.from_transport(t)
+            client.get_channel().settimeout(timeout)
+            return client
+
+        with self._lease(prof, timeout, _open) as sftp:
+            yield sftp
+
+    def exec(
+        self, prof: Dict[str, Any], command: str, timeout: int = 15, gated: bool = True, stdin: Optional[bytes] = None
+    ) -> Dict[str, Any]:
+        """Run one command and collect its output (same shape as ``_ssh_exec``).
+
+        ``stdin`` is written to the command's standard input, which is then closed.
+        """
+        with self.channel(prof, timeout, gated) as ch:
+            ch.exec_command(command)
+            if stdin is not None:
+                ch.sendall(stdin)
+                ch.shutdown_write()
+            stdout = ch.makefile("rb")
+            stderr = ch.makefile_stderr("rb")
+            out = stdout.read().decode("utf-8", errors="replace")
+            err = stderr.read().decode("utf-8", errors="replace")
+            code = ch.recv_exit_status()
+        return {"ok": code == 0, "out": out, "err": err, "code": code}
+
+
+_POOL: Optional[SSHPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> SSHPool:
+    """Return the process-wide pool, configured once from the ``api`` block."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            try:
+                cfg = load_config()
+                api_cfg = cfg.get("api") if isinstance(cfg.get("api"), dict) else {}
+                _POOL = SSHPool(
+                    idle_timeout=int(api_cfg.get("ssh_idle_timeout", 300)),
+                    keepalive=int(api_cfg.get("ssh_keepalive", 30)),
+                    max_sessions=int(api_cfg.get("ssh_max_sessions", 8)),
+                )
+            except Exception:
+                _POOL = SSHPool()
+        return _POOL
@@ -105,7 +105,7 @@ function addPathResultsUnder(tbody, profileId, profileName, path, lines, maxLine
   containerTd.appendChild(block);
 }
 
-function addTextFileResultsUnder(tbody, profileId, profileName, basePath, filePath, lines, maxLines){
+function addTextFileResultsUnder(tbody, profileId, profileName, basePath, filePath, lines, maxLines, pathId){
   ensureProfileFolder(tbody, profileId, profileName);
   const containerTd = tbody.querySelector(`tr.folder-row[data-pid="${profileId}"] + tr.folder-container td`);
   // Group per base path: find or create a wrapper block
@@ -135,12 +135,45 @@ function addTextFileResultsUnder(tbody, profileId, profileName, basePath, filePa
     tb.appendChild(r);
   });
   tbl.appendChild(tb);
+  const followBtn = document.createElement('button'); followBtn.textContent='Follow';
+  followBtn.style.marginLeft='0.5rem'; followBtn.style.padding='0.125rem 0.5rem';
+  followBtn.addEventListener('click', (e)=>{ e.stopPropagation(); toggleFollow(followBtn, tb, title, profileId, filePath, pathId, maxN); });
+  title.appendChild(followBtn);
   block.appendChild(title); block.appendChild(tbl);
   title.style.cursor='pointer';
   title.addEventListener('click', ()=>{ tbl.style.display = (tbl.style.display==='none')? '' : 'none'; });
   filesContainer.appendChild(block);
 }
 
+// Live follow of one remote file over SSE; appends new lines and keeps the last maxN rows
+const FOLLOWERS = new Set();
+function toggleFollow(btn, tb, title, profileId, filePath, pathId, maxN){
+  if(btn._es){ btn._es.close(); FOLLOWERS.delete(btn._es); btn._es = null; btn.textContent='Follow'; return; }
+  const qs = new URLSearchParams({ pattern: filePath });
+  if(pathId != null) qs.set('path_id', String(pathId));
+  const es = new EventSource(`/api/profiles/${profileId}/follow?${qs.toString()}`);
+  btn._es = es; FOLLOWERS.add(es); btn.textContent='Stop';
+  const counter = title.querySelector('.muted');
+  es.addEventListener('lines', (m)=>{
+    let frame = {}; try{ frame = JSON.parse(m.data); }catch{ return; }
+    (frame.lines||[]).forEach((ln)=>{
+      const r = document.createElement('tr'); r.style.cursor='pointer';
+      r.innerHTML = `<td style=\"width:56px\" class=\"muted\">${tb.children.length+1}</td><td>${escapeHtml(ln)}</td>`;
+      r.onclick = ()=> openRecordModal(profileId, filePath, ln);
+      tb.appendChild(r);
+    });
+    while(tb.children.length > maxN){ tb.removeChild(tb.firstChild); }
+    Array.from(tb.children).forEach((r, i)=>{ r.firstChild.textContent = String(i+1); });
+    if(counter) counter.textContent = ` (${tb.children.length})`;
+  });
+  es.addEventListener('done', (m)=>{
+    let frame = {}; try{ frame = JSON.parse(m.data); }catch{}
+    if(frame.error) setRunMessage(`Follow ${filePath}: ${frame.error}`, 'error');
+    es.close(); FOLLOWERS.delete(es); btn._es = null; btn.textContent='Follow';
+  });
+}
+function stopAllFollowers(){ FOLLOWERS.forEach(es=> es.close()); FOLLOWERS.clear(); }
+
 function addImageResultsUnder(tbody, profileId, profileName, path, files){
   ensureProfileFolder(tbody, profileId, profileName);
   const containerTd = tbody.querySelector(`tr.folder-row[data-pid="${profileId}"] + tr.folder-container td`);
@@ -170,6 +203,26 @@ function addImageResultsUnder(tbody, profileId, profileName, path, files){
 }
 
 
+// Stream newline-delimited JSON from the API; calls onItem for every parsed line.
+async function fetchNDJSON(url, opts, onItem){
+  const r = await fetch(url, opts||{});
+  if(!r.ok || !r.body){ let data={}; try{ data = await r.json(); }catch{} throw new Error(data.error || ('HTTP '+r.status)); }
+  const reader = r.body.getReader();
+  const dec = new TextDecoder();
+  let buf = '';
+  for(;;){
+    const {value, done} = await reader.read();
+    if(done) break;
+    buf += dec.decode(value, {stream:true});
+    let nl;
+    while((nl = buf.indexOf('\n')) >= 0){
+      const line = buf.slice(0, nl); buf = buf.slice(nl+1);
+      if(line.trim()){ try{ onItem(JSON.parse(line)); }catch(e){ dbg('bad ndjson line', line, e); } }
+    }
+  }
+  if(buf.trim()){ try{ onItem(JSON.parse(buf)); }catch{} }
+}
+
 async function runAll(){
   const runBtn = document.getElementById('runAll');
   const oldLabel = runBtn.textContent;
@@ -178,75 +231,43 @@ async function runAll(){
   try{
     collectSelected();
     try{ setPref('logs.selectedProfiles', Array.from(state.selected)); }catch{}
+    stopAllFollowers();
     const tbody = document.querySelector('#resultTable tbody'); tbody.innerHTML='';
     const maxLines = parseInt(document.getElementById('maxLines').value||getPref('logs.maxLines','200'),10);
     setPref('logs.maxLines', maxLines);
-    dbg('runAll start', Array.from(state.selected), maxLines);
-    for(const p of state.profiles){
-      if(!state.selected.has(p.id)) continue;
-      if(String(p.protocol||'').toLowerCase()!=='ssh') continue;
-      // Connectivity check: skip all tasks for this profile if unreachable
-      try{
-        const ping = await fetchJSON(`/api/profiles/${p.id}/ping`);
-        const okPing = !!(ping.ok && ping.data && ping.data.ok !== false ? ping.data.ok : false) || (ping.data && ping.data.ok === true);
-        if(!okPing){
-          const errMsg = (ping.data && (ping.data.error||ping.data.err)) || 'Connection failed';
-          const msg = `Cannot connect to ${p.name} (${p.host||''})`;
-          setRunMessage(`${msg}: ${errMsg}`, 'error');
-          alert(`${msg}\n${errMsg}`);
-          continue;
-        }
-      }catch(e){
-        const msg = `Cannot connect to ${p.name}`;
-        setRunMessage(msg, 'error');
-        alert(msg);
-        continue;
-      }
-      const resPaths = await fetchJSON(`/api/profiles/${p.id}/paths`);
-      const paths = (resPaths.ok && resPaths.data.paths) || [];
-      dbg('paths', p.name, paths);
-      for(const pathObj of paths){
-        const typ = String(pathObj.type||'text').toLowerCase();
-        // Expand files first (auto-detect if needed)
-        const qlist = new URLSearchParams();
-        qlist.set('pattern', pathObj.path);
-        qlist.set('type', typ==='image' ? 'image' : 'auto');
-        qlist.set('limit', String(maxLines));
-        if(pathObj.cmd_suffix) qlist.set('cmd_suffix', pathObj.cmd_suffix);
-        const listRes = await fetchJSON(`/api/profiles/${p.id}/list?`+qlist.toString());
-        if(!listRes.ok || (listRes.data && listRes.data.error)){
-          const errMsg = (listRes.data && listRes.data.error) || 'List failed';
-          const msg = `Stopped ${p.name}: ${errMsg}`;
-          setRunMessage(msg, 'error');
-          alert(msg);
-          break;
-        }
-        const files = (listRes.data && listRes.data.files) || [];
-        dbg('files', pathObj.path, files.length);
-        if(typ === 'image' || (listRes.data && listRes.data.type === 'image')){
-          addImageResultsUnder(tbody, p.id, p.name, pathObj.path, files);
-          continue;
-        }
-        // Text flow: tail each file individually, honoring grep_chain
-        for(const fp of files){
-          const q = new URLSearchParams();
-          q.set('pattern', fp);
-          q.set('lines', String(maxLines));
-          (pathObj.grep_chain||[]).forEach(g=> q.append('grep', g));
-          if(pathObj.cmd_suffix) q.set('cmd_suffix', pathObj.cmd_suffix);
-          const res = await fetchJSON(`/api/profiles/${p.id}/cat?`+q.toString());
-          if(!res.ok || (res.data && res.data.error)){
-            const errMsg = (res.data && res.data.error) || 'Connection or command failed';
-            const msg = `Stopped ${p.name}: ${errMsg}`;
-            setRunMessage(msg, 'error');
-            alert(msg);
-            break; // cancel remaining files for this path/profile
-          }
-          addTextFileResultsUnder(tbody, p.id, p.name, pathObj.path, fp, (res.ok && res.data.lines)||[], maxLines);
-        }
+    const ids = state.profiles
+      .filter(p=> state.selected.has(p.id) && String(p.protocol||'').toLowerCase()==='ssh')
+      .map(p=> p.id);
+    dbg('runAll start', ids, maxLines);
+    const errors = [];
+    let files = 0;
+    // Server fans out over profiles/paths/files in parallel and streams each result as it finishes
+    await fetchNDJSON('/api/run', {
+      method:'POST', headers:{'Content-Type':'application/json'},
+      body: JSON.stringify({ profile_ids: ids, lines: maxLines })
+    }, (ev)=>{
+      const p = state.profiles.find(x=> x.id === ev.profile_id) || { name: ev.profile, host: '' };
+      if(ev.type === 'profile' && ev.ok === false){
+        errors.push(`Cannot connect to ${p.name} (${p.host||''}): ${ev.error||'Connection failed'}`);
+      } else if(ev.type === 'error'){
+        errors.push(`${p.name||''} ${ev.file||ev.path||''}: ${ev.error||'Connection or command failed'}`);
+      } else if(ev.type === 'image'){
+        addImageResultsUnder(tbody, ev.profile_id, p.name, ev.path, ev.files||[]);
+      } else if(ev.type === 'file'){
+        files++;
+        if(ev.error) errors.push(`${p.name||''} ${ev.file||''}: ${ev.error}`);
+        addTextFileResultsUnder(tbody, ev.profile_id, p.name, ev.path, ev.file, ev.lines||[], maxLines, ev.path_id);
+      } else if(ev.type === 'done'){
+        dbg('runAll done', ev.elapsed_ms, 'ms', files, 'files');
       }
+      if(errors.length) setRunMessage(errors[errors.length-1], 'error');
+    });
+    if(errors.length){
+      setRunMessage(errors.join('\n'), 'error');
+      alert(errors.join('\n'));
+    } else {
+      setRunMessage('Done', 'info');
     }
-    setRunMessage('Done', 'info');
   } catch (err){
     setRunMessage('Run failed: '+ String(err), 'error');
   } finally {
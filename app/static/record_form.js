@@ -58,10 +58,10 @@ function openRecordForm(opts){
     block.style.display='block';
     data.images.forEach((img, idx)=>{
       const t=document.createElement('div'); t.className='thumb';
-      const im=document.createElement('img'); im.src=img.url||img.path; t.appendChild(im);
+      const im=document.createElement('img'); im.src=img.thumb||img.url||img.path; im.loading='lazy'; t.appendChild(im);
       const m=document.createElement('div'); m.className='meta';
       const si=document.createElement('span'); si.className='idx'; si.textContent=img.id? `#${img.id}` : `#${idx+1}`; m.appendChild(si);
-      const vb=document.createElement('button'); vb.type='button'; vb.textContent='View'; vb.dataset.src=im.src; m.appendChild(vb);
+      const vb=document.createElement('button'); vb.type='button'; vb.textContent='View'; vb.dataset.src=img.url||img.path; m.appendChild(vb);
       if(img.id){ const rb=document.createElement('button'); rb.type='button'; rb.textContent='Remove'; rb.dataset.id=img.id; rb.style.borderColor='#991b1b'; m.appendChild(rb); }
       t.appendChild(m); list.appendChild(t);
     });
@@ -106,8 +106,11 @@ document.addEventListener('DOMContentLoaded', ()=>{
       if(rec) rec.id = recId;
       try{
         const imgsSel = JSON.parse(document.getElementById('selectedImagesJson').value||'[]');
-        for(const rp of imgsSel){
-          await fetch(`/api/records/${recId}/image_remote`, { method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ profile_id: payload.profile_id, path: rp }) });
+        if(imgsSel.length){
+          // One batch call; the server fetches in parallel and streams per-image NDJSON progress
+          const r = await fetch(`/api/records/${recId}/images_remote`, { method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ profile_id: payload.profile_id, paths: imgsSel }) });
+          const failed = (await r.text()).split('\n').filter(Boolean).map(l=>{ try{ return JSON.parse(l); }catch{ return {}; } }).filter(ev=> ev.type==='image' && !ev.ok);
+          if(failed.length) alert('Some images could not be attached:\n' + failed.map(ev=> `${ev.path}: ${ev.error}`).join('\n'));
         }
       }catch{}
       const files = (form.querySelector('input[name="images"]').files)||[];
@@ -145,6 +148,6 @@ function openRecordModal(profileId, path, line){
   openRecordForm({ profile_id: profileId, file_path: path, content: line });
 }
 function openImageRecordModal(profileId, imagePath){
-  openRecordForm({ profile_id: profileId, file_path: imagePath, images:[{path:`/api/profiles/${profileId}/image?path=${encodeURIComponent(imagePath)}`}], selectedImages:[imagePath] });
+  openRecordForm({ profile_id: profileId, file_path: imagePath, images:[{path:`/api/profiles/${profileId}/image?path=${encodeURIComponent(imagePath)}`, thumb:`/api/profiles/${profileId}/image?path=${encodeURIComponent(imagePath)}&thumb=1`}], selectedImages:[imagePath] });
 }
 function closeRecordModal(){ closeRecordForm(); }
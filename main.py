@@ -4,6 +4,7 @@ import sys
 import threading
 import webbrowser
 import logging
+import multiprocessing
 from typing import Optional
 import tempfile
 
@@ -276,6 +277,9 @@ class TrayApp:
 
 
 if __name__ == "__main__":
+    # Parallel log search uses worker processes; frozen builds must let
+    # those re-entries through before taking the single-instance lock
+    multiprocessing.freeze_support()
     try:
         _lock_fd = acquire_app_lock()
     except SingleInstanceError: